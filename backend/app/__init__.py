@@ -4,10 +4,11 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_cors import CORS
 from backend.config.config import config
+from backend.app.utils.db_routing import RoutingSession
 from datetime import timedelta
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
@@ -42,16 +43,51 @@ def create_app(config_name='default'):
             ],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Range", "X-Content-Range"],
+            "expose_headers": ["Content-Range", "X-Content-Range", "X-Next-Cursor"],
             "supports_credentials": True
         }
     })
     
+    # Pool sizing, recycling, pre-ping and statement timeout from the DB_* settings
+    from backend.app.utils.db_pool import engine_options
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    
+    # Read replicas are extra binds that only RoutingSession picks, for @read_only handlers
+    from backend.app.utils.db_routing import replica_binds, init_read_replicas
+    app.config['SQLALCHEMY_BINDS'] = {**app.config.get('SQLALCHEMY_BINDS', {}), **replica_binds(app.config)}
+    
     # Initialize extensions with app
     db.init_app(app)
+    init_read_replicas(app, db)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     
+    # Count SQL statements per request, failing requests over MAX_QUERIES_PER_REQUEST
+    from backend.app.utils.query_counter import init_query_budget
+    with app.app_context():
+        init_query_budget(app, db.engine)
+    
+    # WAL, busy_timeout and cache pragmas on every SQLite connection
+    from backend.app.utils.sqlite_tuning import init_sqlite_pragmas
+    with app.app_context():
+        init_sqlite_pragmas(app, db.engine)
+    
+    # Maintain the materialized appointment counters when they are enabled
+    from backend.app.utils.appointment_counters import init_appointment_counters
+    init_appointment_counters(db.session)
+    
+    # Drop cached dashboard and profile data of users touched by a commit
+    from backend.app.utils.response_cache import init_response_cache
+    init_response_cache(db.session)
+    
+    # Log appointment changes for the live event stream
+    from backend.app.utils.appointment_events import init_appointment_events
+    init_appointment_events(db.session)
+    
+    # Keep the full-text search index in step with health records
+    from backend.app.utils.search_index import init_search_index
+    init_search_index(db.session)
+    
     # Import and register blueprints
     from backend.app.routes.auth import auth_bp
     from backend.app.routes.main import main_bp
@@ -65,6 +101,10 @@ def create_app(config_name='default'):
     app.register_blueprint(doctor_bp)
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # Register CLI commands
+    from backend.app.commands import register_commands
+    register_commands(app)
+    
     # Import models to ensure they are known to Flask-SQLAlchemy
     from backend.app.models import User, DoctorProfile, PatientProfile
     
@@ -72,8 +112,21 @@ def create_app(config_name='default'):
     def load_user(user_id):
         return User.query.get(int(user_id))
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Start the appointment reminder scheduler in processes that serve requests
+    if app.config['REMINDER_SCHEDULER_ENABLED']:
+        from backend.app.utils.reminder_scheduler import get_reminder_scheduler
+        from backend.app.utils.notification_utils import get_notification_utils
+        
+        @app.before_request
+        def start_reminder_scheduler():
+            if get_notification_utils().email_enabled:
+                get_reminder_scheduler().start()
+    
+    # No DDL or schema reflection here: workers boot without touching the
+    # database, and the schema is migrated with 'flask schema upgrade'
+    if app.config['CREATE_SCHEMA_ON_STARTUP']:
+        with app.app_context():
+            # Primary only: replicas get the schema through replication
+            db.create_all(bind_key=None)
     
     return app 
\ No newline at end of file
@@ -9,6 +9,8 @@ from config import settings
 from encryption_utils import get_encryption_utils
 from notification_utils import get_notification_utils
 from file_processor import get_file_processor
+from ingestion import ingest_upload, UploadTooLarge, UnsupportedFileType
+from health_analysis import analyze_rows
 import os
 import json
 import re
@@ -124,35 +126,30 @@ async def upload_record(
     if file.filename.split('.')[-1].lower() not in settings.ALLOWED_FILE_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type")
     
-    if len(await file.read()) > settings.MAX_FILE_SIZE:
+    # Stream the upload once: enforce the size limit, hash, sniff and encrypt
+    try:
+        ingested = ingest_upload(
+            file.file,
+            "uploads",
+            f"{current_user.id}_{record_type}",
+            settings.MAX_FILE_SIZE,
+            keep_plaintext=True
+        )
+    except UploadTooLarge:
         raise HTTPException(status_code=400, detail="File too large")
+    except UnsupportedFileType:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+    encrypted_filename = ingested.path
     
-    # Process file based on type
-    upload_dir = "uploads"
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{upload_dir}/{timestamp}_{current_user.id}_{record_type}"
-    
-    # Add file extension
-    ext = file.filename.split('.')[-1].lower()
-    filename += f".{ext}"
-    
-    # Save and encrypt file
-    with open(filename, "wb") as f:
-        f.write(await file.read())
-    
-    encrypted_filename = filename + ".enc"
-    encryption_utils.encrypt_file(filename, encrypted_filename)
-    os.remove(filename)  # Remove unencrypted file
-    
-    # Process file content
-    analysis = {}
-    if ext == "pdf":
-        analysis = file_processor.process_pdf(filename)
-    elif ext in ["png", "jpg", "jpeg"]:
-        analysis = file_processor.process_image(filename)
+    # Process file content from the plaintext temp copy, then discard it
+    try:
+        analysis = {}
+        if ingested.extension == "pdf":
+            analysis = file_processor.process_pdf(ingested.plaintext_path)
+        elif ingested.extension in ["png", "jpg"]:
+            analysis = file_processor.process_image(ingested.plaintext_path)
+    finally:
+        ingested.cleanup()
     
     # Create database record
     db_record = HealthRecord(
@@ -275,67 +272,32 @@ async def analyze_health(user_id: int, current_user: User = Depends(get_current_
         if current_user.id != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to view this analysis")
     
-    records = db.query(HealthRecord).filter(HealthRecord.user_id == user_id).all()
+    records = db.query(HealthRecord).filter(HealthRecord.user_id == user_id).order_by(HealthRecord.upload_date).all()
     
-    # Get all decrypted metadata
-    all_metadata = []
+    # One reading per record and metric, dated by the record it came from
+    metrics = ["blood_pressure", "cholesterol", "glucose", "heart_rate"]
+    analysis = {metric: {"current": "", "history": [], "trend": "", "status": ""} for metric in metrics}
+    readings = []
     for record in records:
-        decrypted_metadata = encryption_utils.decrypt_data(record.metadata)
-        all_metadata.append(json.loads(decrypted_metadata))
-    
-    # Perform comprehensive analysis
-    analysis = {
-        "blood_pressure": {
-            "current": "",
-            "history": [],
-            "trend": "",
-            "status": ""
-        },
-        "cholesterol": {
-            "current": "",
-            "history": [],
-            "trend": "",
-            "status": ""
-        },
-        "glucose": {
-            "current": "",
-            "history": [],
-            "trend": "",
-            "status": ""
-        },
-        "heart_rate": {
-            "current": "",
-            "history": [],
-            "trend": "",
-            "status": ""
-        }
-    }
-    
-    # Analyze each metric
-    for metric in ["blood_pressure", "cholesterol", "glucose", "heart_rate"]:
-        for meta in all_metadata:
-            if metric in meta:
-                analysis[metric]["history"].append({
-                    "value": meta[metric]["value"],
-                    "status": meta[metric]["status"],
-                    "date": record.upload_date
-                })
-                
-                # Update current value
-                if not analysis[metric]["current"]:
-                    analysis[metric]["current"] = meta[metric]["value"]
-                    analysis[metric]["status"] = meta[metric]["status"]
-        
-        # Generate trend analysis
-        if len(analysis[metric]["history"]) > 1:
-            analysis[metric]["trend"] = "Stable"
-            # Simple trend analysis based on last 3 readings
-            if len(analysis[metric]["history"]) >= 3:
-                last_three = analysis[metric]["history"][-3:]
-                if all(x["status"] == "High" for x in last_three):
-                    analysis[metric]["trend"] = "Increasing"
-                elif all(x["status"] == "Low" for x in last_three):
-                    analysis[metric]["trend"] = "Decreasing"
+        meta = json.loads(encryption_utils.decrypt_data(record.metadata))
+        for metric in metrics:
+            if metric not in meta:
+                continue
+            value, reading_status = meta[metric]["value"], meta[metric]["status"]
+            analysis[metric]["history"].append({"value": value, "status": reading_status, "date": record.upload_date})
+            analysis[metric]["current"] = value
+            analysis[metric]["status"] = reading_status
+            try:
+                components = [float(part) for part in str(value).split("/")]
+            except ValueError:
+                continue
+            readings.append((user_id, metric, record.upload_date, components[0],
+                             components[1] if len(components) > 1 else None, reading_status, None))
+    
+    # Trends come from least-squares slopes over the numeric readings
+    for metric, stats in analyze_rows(readings).get(user_id, {}).items():
+        analysis[metric]["trend"] = stats["trend"]
+        analysis[metric]["statistics"] = stats
     
     # Generate audit log
     audit_log = encryption_utils.generate_audit_log(
@@ -0,0 +1,196 @@
+import click
+from flask.cli import AppGroup
+
+extraction_cli = AppGroup('extraction', help='Manage background document extraction.')
+
+@extraction_cli.command('requeue')
+@click.option('--wait/--no-wait', default=True, help='Stay in the foreground until the jobs finish.')
+def requeue_extraction(wait):
+    """Re-submit pending and stalled extraction jobs."""
+    from backend.app.utils.extraction_queue import get_extraction_queue
+    queue = get_extraction_queue()
+    count = queue.requeue_pending()
+    click.echo(f'Queued {count} extraction job(s).')
+    if wait:
+        queue.wait()
+        click.echo('Extraction queue drained.')
+
+mail_cli = AppGroup('mail', help='Manage the outbound mail queue.')
+
+@mail_cli.command('requeue-dead-letters')
+def requeue_dead_letters():
+    """Send dead-lettered messages again and wait for delivery."""
+    from backend.app.utils.mail_queue import get_mail_queue
+    mail_queue = get_mail_queue()
+    count = mail_queue.requeue_dead_letters()
+    mail_queue.flush()
+    click.echo(f'Requeued {count} message(s); {mail_queue.dead_letters.count()} still undeliverable.')
+
+counters_cli = AppGroup('counters', help='Manage the materialized appointment counters.')
+
+@counters_cli.command('rebuild')
+@click.option('--check', is_flag=True, help='Only report counters that differ from the appointments table.')
+def rebuild_counters(check):
+    """Recompute appointment_counters from the appointments table."""
+    from backend.app import db
+    from backend.app.utils import appointment_counters
+    with db.engine.begin() as connection:
+        if check:
+            expected = appointment_counters.expected_counters(connection)
+            stored = appointment_counters.stored_counters(connection)
+            mismatched = sorted(key for key in expected.keys() | stored.keys()
+                                if expected.get(key, (0, 0)) != stored.get(key, (0, 0)))
+            for scope, owner_id, period in mismatched:
+                click.echo(f'{scope} {owner_id} {period}: stored {stored.get((scope, owner_id, period), (0, 0))}, '
+                           f'expected {expected.get((scope, owner_id, period), (0, 0))}')
+            click.echo(f'{len(mismatched)} of {len(expected)} counter(s) out of date.')
+            if mismatched:
+                raise SystemExit(1)
+        else:
+            count = appointment_counters.rebuild_counters(connection)
+            click.echo(f'Rebuilt {count} counter(s).')
+
+metrics_cli = AppGroup('metrics', help='Manage the health_metrics time series.')
+
+@metrics_cli.command('backfill')
+@click.option('--rebuild', is_flag=True, help='Replace the readings of every attachment, not only missing ones.')
+@click.option('--batch-size', default=500, show_default=True, help='Attachments read and committed per batch.')
+def backfill_metrics(rebuild, batch_size):
+    """Fill health_metrics from the extracted_data of completed attachments."""
+    from backend.app import db
+    from backend.app.utils import health_metrics
+    scanned, written = health_metrics.backfill_metrics(db.session, batch_size, rebuild)
+    click.echo(f'Stored {written} reading(s) from {scanned} attachment(s).')
+
+search_cli = AppGroup('search', help='Manage the full-text search index.')
+
+@search_cli.command('rebuild')
+@click.option('--batch-size', default=1000, show_default=True, help='Health records indexed per statement.')
+def rebuild_search(batch_size):
+    """Recreate the search index from every health record and attachment."""
+    from backend.app import db
+    from backend.app.utils.search_index import rebuild_search_index, search_supported
+    with db.engine.begin() as connection:
+        if not search_supported(connection):
+            raise click.ClickException(f'Full-text search is not supported on {connection.dialect.name}.')
+        count = rebuild_search_index(connection, batch_size)
+    click.echo(f'Indexed {count} health record(s).')
+
+schema_cli = AppGroup('schema', help='Manage the database schema (Alembic migrations).')
+
+def _schema_state():
+    """(applied revisions, head revisions, existing tables) of the app database"""
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    from flask import current_app
+    from sqlalchemy import inspect
+    from backend.app import db
+    script = ScriptDirectory.from_config(current_app.extensions['migrate'].migrate.get_config())
+    with db.engine.connect() as connection:
+        applied = set(MigrationContext.configure(connection).get_current_heads())
+        tables = set(inspect(connection).get_table_names())
+    return applied, set(script.get_heads()), tables
+
+@schema_cli.command('upgrade')
+@click.option('--revision', default='head', show_default=True, help='Revision to migrate to.')
+def upgrade_schema(revision):
+    """Create or migrate the database schema; run once per deploy, not per worker."""
+    from flask_migrate import upgrade
+    applied, heads, tables = _schema_state()
+    if not applied and tables - {'alembic_version'}:
+        # Tables made by db.create_all(): Alembic cannot tell which migrations they already contain
+        raise click.ClickException(
+            'The database has tables but no migration history. Mark the revision it matches with '
+            "'flask db stamp <revision>' (see migrations/versions), then run this command again."
+        )
+    upgrade(revision=revision)
+    click.echo(f'Schema at {", ".join(sorted(_schema_state()[0])) or "base"}.')
+
+@schema_cli.command('check')
+def check_schema():
+    """Exit with status 1 unless the database is at the latest migration."""
+    applied, heads, _ = _schema_state()
+    if applied != heads:
+        click.echo(f'Schema at {", ".join(sorted(applied)) or "base"}, expected {", ".join(sorted(heads))}.')
+        raise SystemExit(1)
+    click.echo(f'Schema up to date ({", ".join(sorted(heads))}).')
+
+replicas_cli = AppGroup('replicas', help='Inspect the read replicas (DB_REPLICA_URLS).')
+
+@replicas_cli.command('check')
+def check_replicas():
+    """Check every replica now; exit with status 1 if any is unusable."""
+    from backend.app.utils.db_routing import get_replica_set
+    replicas = get_replica_set()
+    if replicas is None:
+        click.echo('No replicas configured; every query goes to the primary.')
+        return
+    healthy = [replicas.check(engine) for engine in replicas.engines]
+    for engine, ok in zip(replicas.engines, healthy):
+        click.echo(f'{engine.url.render_as_string()}: {"healthy" if ok else "unavailable"}')
+    if not all(healthy):
+        raise SystemExit(1)
+
+@replicas_cli.command('sync')
+def sync_replicas():
+    """Copy a SQLite primary into SQLite replica files, as a local stand-in for replication."""
+    import sqlite3
+    from backend.app import db
+    from backend.app.utils.db_routing import get_replica_set
+    replicas = get_replica_set()
+    if replicas is None or db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('sync needs a SQLite primary and SQLite replicas.')
+    source = sqlite3.connect(db.engine.url.database)
+    try:
+        for engine in replicas.engines:
+            if engine.dialect.name != 'sqlite':
+                raise click.ClickException(f'{engine.url.render_as_string()} is not a SQLite database.')
+            engine.dispose()
+            target = sqlite3.connect(engine.url.database)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+            click.echo(f'Copied the primary to {engine.url.database}.')
+    finally:
+        source.close()
+
+encryption_cli = AppGroup('encryption', help='Manage the encryption key of attachment files.')
+
+@encryption_cli.command('rotate-key')
+@click.option('--new-secret', prompt=True, hide_input=True, confirmation_prompt=True, envvar='NEW_ENCRYPTION_KEY',
+              help='The new ENCRYPTION_KEY value (prompted for if not given).')
+def rotate_encryption_key(new_secret):
+    """Re-encrypt every attachment file with the key of a new ENCRYPTION_KEY.
+
+    Files already readable with the new key are skipped, so an interrupted
+    run can simply be started again with the same secret.
+    """
+    import os
+    from backend.app import db
+    from backend.app.models import FileAttachment
+    from backend.utils.encryption_utils import EncryptionUtils, get_encryption_utils
+    current = get_encryption_utils()
+    target = EncryptionUtils.for_secret(new_secret)
+    rotated = skipped = 0
+    for (file_path,) in db.session.query(FileAttachment.file_path).filter(FileAttachment.file_path.like('%.enc')):
+        if not os.path.exists(file_path) or target.can_decrypt(file_path):
+            skipped += 1
+            continue
+        current.reencrypt_file(file_path, target)
+        rotated += 1
+    key_file = EncryptionUtils.key_file()
+    with open(key_file + '.new', 'wb') as f:
+        f.write(target.key)
+    os.replace(key_file + '.new', key_file)
+    click.echo(f'Re-encrypted {rotated} file(s), skipped {skipped}. Set ENCRYPTION_KEY to the new secret on every host.')
+
+def register_commands(app):
+    app.cli.add_command(extraction_cli)
+    app.cli.add_command(mail_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(metrics_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(replicas_cli)
+    app.cli.add_command(encryption_cli)
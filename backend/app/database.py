@@ -13,7 +13,7 @@ Base.query = db_session.query_property()
 def init_db():
     # Import all modules here that might define models
     from backend.app.models import User, HealthRecord, Appointment
-Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
 
 if __name__ == '__main__':
     init_db()
@@ -60,6 +60,20 @@ class PatientProfile(db.Model):
 
 class Appointment(db.Model):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        # Doctor schedules and listings: doctor_id filter, ordered by date
+        db.Index('ix_appointments_doctor_id_appointment_date', 'doctor_id', 'appointment_date'),
+        # Patient listings ordered by date, and upcoming appointments by status
+        db.Index('ix_appointments_user_id_appointment_date', 'user_id', 'appointment_date'),
+        db.Index('ix_appointments_user_id_status_appointment_date', 'user_id', 'status', 'appointment_date'),
+        # Version tokens for conditional GETs: max(updated_at) per doctor and per patient
+        db.Index('ix_appointments_doctor_id_updated_at', 'doctor_id', 'updated_at'),
+        db.Index('ix_appointments_user_id_updated_at', 'user_id', 'updated_at'),
+        # Reminder scans only ever look at scheduled appointments
+        db.Index('ix_appointments_scheduled_appointment_date', 'appointment_date',
+                 postgresql_where=db.text("status = 'scheduled'"),
+                 sqlite_where=db.text("status = 'scheduled'")),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -68,13 +82,46 @@ class Appointment(db.Model):
     reason = db.Column(db.String(200))
     status = db.Column(db.String(20), default='scheduled')  # scheduled, completed, cancelled
     notes = db.Column(db.Text)
+    reminder_sent_at = db.Column(db.DateTime)  # set when a reminder is claimed for sending
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     health_record = db.relationship('HealthRecord', backref='appointment', uselist=False)
 
+class AppointmentEvent(db.Model):
+    """Append-only log of appointment changes; the id is the SSE event id"""
+    __tablename__ = 'appointment_events'
+    __table_args__ = (
+        db.Index('ix_appointment_events_patient_user_id_id', 'patient_user_id', 'id'),
+        db.Index('ix_appointment_events_doctor_user_id_id', 'doctor_user_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    appointment_id = db.Column(db.Integer, nullable=False)
+    patient_user_id = db.Column(db.Integer)
+    doctor_user_id = db.Column(db.Integer)
+    event_type = db.Column(db.String(20), nullable=False)  # created, status, notes
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class AppointmentCounter(db.Model):
+    """Materialized appointment counts per doctor or patient, kept in step with
+    the appointments table when APPOINTMENT_COUNTERS_ENABLED is set"""
+    __tablename__ = 'appointment_counters'
+    
+    scope = db.Column(db.String(10), primary_key=True)  # doctor, patient
+    owner_id = db.Column(db.Integer, primary_key=True)  # doctor_profiles.id or users.id
+    period = db.Column(db.String(7), primary_key=True)  # 'all' or 'YYYY-MM' of the appointment date
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+
 class HealthRecord(db.Model):
     __tablename__ = 'health_records'
+    __table_args__ = (
+        db.Index('ix_health_records_patient_id_created_at', 'patient_id', 'created_at'),
+        db.Index('ix_health_records_patient_id_updated_at', 'patient_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patient_profiles.id'))
@@ -83,22 +130,56 @@ class HealthRecord(db.Model):
     title = db.Column(db.String(100), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # File attachments
-    attachments = db.relationship('FileAttachment', backref='health_record', lazy='dynamic')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # File attachments (a plain list so serializers can eager load it)
+    attachments = db.relationship('FileAttachment', backref='health_record', lazy='select')
+    
+    # Doctor of the appointment the record was written for, if any
+    doctor = db.relationship(
+        'DoctorProfile', secondary='appointments',
+        primaryjoin='HealthRecord.appointment_id == Appointment.id',
+        secondaryjoin='Appointment.doctor_id == DoctorProfile.id',
+        viewonly=True, uselist=False
+    )
 
 class FileAttachment(db.Model):
     __tablename__ = 'file_attachments'
     
     id = db.Column(db.Integer, primary_key=True)
-    health_record_id = db.Column(db.Integer, db.ForeignKey('health_records.id'))
+    health_record_id = db.Column(db.Integer, db.ForeignKey('health_records.id'), index=True)
     filename = db.Column(db.String(255), nullable=False)
     file_type = db.Column(db.String(50), nullable=False)
     file_path = db.Column(db.String(255), nullable=False)
+    file_size = db.Column(db.Integer)
+    content_hash = db.Column(db.String(64))  # SHA-256 of the plaintext
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Extracted data (for medical documents)
     extracted_data = db.Column(db.JSON)
+    extracted_text = db.Column(db.Text)  # OCR/PDF text, indexed for search
+    extraction_status = db.Column(db.String(20), default='pending')  # pending, processing, completed, failed
+    extraction_attempts = db.Column(db.Integer, default=0)
+    extraction_error = db.Column(db.Text)
+    extraction_started_at = db.Column(db.DateTime)
+    extracted_at = db.Column(db.DateTime)
+
+class HealthMetric(db.Model):
+    """One numeric reading taken from an attachment's extracted_data"""
+    __tablename__ = 'health_metrics'
+    __table_args__ = (
+        db.Index('ix_health_metrics_patient_id_metric_observed_at', 'patient_id', 'metric', 'observed_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patient_profiles.id'), nullable=False)
+    attachment_id = db.Column(db.Integer, db.ForeignKey('file_attachments.id'), index=True)
+    metric = db.Column(db.String(50), nullable=False)  # blood_pressure, glucose, ...
+    value = db.Column(db.Float, nullable=False)
+    secondary_value = db.Column(db.Float)  # second component, e.g. diastolic pressure
+    unit = db.Column(db.String(20))
+    status = db.Column(db.String(20))  # Normal, High, Low, Unknown
+    observed_at = db.Column(db.DateTime, nullable=False)
 
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
@@ -0,0 +1,162 @@
+from sqlalchemy import and_, case, distinct, func, select, true
+from sqlalchemy.orm import joinedload, selectinload
+from datetime import datetime
+from backend.app import db
+from backend.app.models import Appointment, HealthRecord, DoctorProfile, PatientProfile, HealthMetric
+from backend.app.utils.appointment_counters import counters_enabled, read_counters, period_of
+
+# Query builders for list views and API serializers. Each one eager loads
+# exactly the relationships its callers render, so a page of rows costs a
+# fixed number of queries instead of one extra query per row.
+
+def doctor_appointments_query(doctor_id: int):
+    """Appointments of a doctor with their patient loaded in the same query"""
+    return Appointment.query.filter(
+        Appointment.doctor_id == doctor_id
+    ).options(joinedload(Appointment.user))
+
+def patient_appointments_query(user_id: int):
+    """Appointments of a patient with the doctor and the doctor's user loaded"""
+    return Appointment.query.filter(
+        Appointment.user_id == user_id
+    ).options(joinedload(Appointment.doctor).joinedload(DoctorProfile.user))
+
+def patient_health_records_query(user_id: int, with_attachments: bool = True, with_doctor: bool = False):
+    """Health records of a patient, with attachments fetched in one extra query
+    and, if asked for, the doctor and the doctor's user loaded in the same query"""
+    query = HealthRecord.query.join(HealthRecord.patient).filter(
+        PatientProfile.user_id == user_id
+    )
+    if with_attachments:
+        query = query.options(selectinload(HealthRecord.attachments))
+    if with_doctor:
+        query = query.options(joinedload(HealthRecord.doctor).joinedload(DoctorProfile.user))
+    return query
+
+def patient_metric_query(user_id: int, metric: str, since: datetime = None, until: datetime = None):
+    """Readings of one metric for a patient in time order.
+
+    Served by a range scan of the (patient_id, metric, observed_at) index.
+    """
+    patient_id = select(PatientProfile.id).where(PatientProfile.user_id == user_id).scalar_subquery()
+    query = HealthMetric.query.filter(HealthMetric.patient_id == patient_id, HealthMetric.metric == metric)
+    if since is not None:
+        query = query.filter(HealthMetric.observed_at >= since)
+    if until is not None:
+        query = query.filter(HealthMetric.observed_at < until)
+    return query.order_by(HealthMetric.observed_at, HealthMetric.id)
+
+def metric_readings(user_ids, since: datetime = None, metrics: list = None) -> list:
+    """(user_id, metric, observed_at, value, secondary_value, status, unit) rows
+    of the given patients in one query, as expected by health_analysis"""
+    statement = select(
+        PatientProfile.user_id, HealthMetric.metric, HealthMetric.observed_at, HealthMetric.value,
+        HealthMetric.secondary_value, HealthMetric.status, HealthMetric.unit
+    ).join(PatientProfile, PatientProfile.id == HealthMetric.patient_id).where(PatientProfile.user_id.in_(user_ids))
+    if since is not None:
+        statement = statement.where(HealthMetric.observed_at >= since)
+    if metrics:
+        statement = statement.where(HealthMetric.metric.in_(metrics))
+    return db.session.execute(statement).all()
+
+def doctor_patient_ids(doctor_id: int):
+    """Subquery of the user ids of every patient who had an appointment with a doctor"""
+    return select(Appointment.user_id).where(Appointment.doctor_id == doctor_id).distinct().scalar_subquery()
+
+def doctor_patient_profile_ids(doctor_id: int):
+    """Subquery of the patient_profiles ids of a doctor's patients"""
+    return select(PatientProfile.id).join(
+        Appointment, Appointment.user_id == PatientProfile.user_id
+    ).where(Appointment.doctor_id == doctor_id).distinct().scalar_subquery()
+
+def month_bounds(now: datetime):
+    """First instant of the month of ``now`` and of the following month"""
+    first_day = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if first_day.month == 12:
+        return first_day, first_day.replace(year=first_day.year + 1, month=1)
+    return first_day, first_day.replace(month=first_day.month + 1)
+
+def _appointment_totals(first_day: datetime, next_month: datetime):
+    """Conditional aggregates that count everything in one pass over the rows"""
+    return (
+        func.count(Appointment.id),
+        func.coalesce(func.sum(case((Appointment.status == 'completed', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(Appointment.appointment_date >= first_day,
+                                          Appointment.appointment_date < next_month), 1), else_=0)), 0)
+    )
+
+def doctor_stats(doctor_id: int) -> dict:
+    """Patient and appointment counts for a doctor in a single query"""
+    first_day, next_month = month_bounds(datetime.now())
+    total_patients = func.count(distinct(Appointment.user_id))
+    if counters_enabled():
+        total, completed, this_month, total_patients = read_counters(
+            'doctor', doctor_id, period_of(first_day),
+            select(total_patients).where(Appointment.doctor_id == doctor_id).scalar_subquery()
+        )
+    else:
+        total, completed, this_month, total_patients = db.session.query(
+            *_appointment_totals(first_day, next_month), total_patients
+        ).filter(Appointment.doctor_id == doctor_id).one()
+    return {
+        'total_patients': total_patients,
+        'total_appointments': total,
+        'completed_appointments': completed,
+        'appointments_this_month': this_month
+    }
+
+def patient_stats(user_id: int) -> dict:
+    """Appointment and health record counts for a patient in a single query"""
+    first_day, next_month = month_bounds(datetime.now())
+    total_records = select(func.count(HealthRecord.id)).join(HealthRecord.patient).where(
+        PatientProfile.user_id == user_id
+    ).scalar_subquery()
+    if counters_enabled():
+        total, completed, this_month, total_records = read_counters(
+            'patient', user_id, period_of(first_day), total_records
+        )
+    else:
+        total, completed, this_month, total_records = db.session.query(
+            *_appointment_totals(first_day, next_month), total_records
+        ).filter(Appointment.user_id == user_id).one()
+    return {
+        'total_appointments': total,
+        'completed_appointments': completed,
+        'appointments_this_month': this_month,
+        'total_records': total_records
+    }
+
+def _version_select(model, *criteria):
+    return select(
+        func.max(model.updated_at).label('updated_at'),
+        func.max(model.id).label('max_id'),
+        func.count(model.id).label('row_count')
+    ).where(*criteria)
+
+def version_token(*statements):
+    """(last_modified, token) describing the rows matched by ``statements``.
+
+    Each statement comes from ``_version_select``; all of them run as one
+    query over the (owner, updated_at) indexes. An update moves
+    max(updated_at), an insert moves max(id) and a delete lowers the count.
+    """
+    subqueries = [statement.subquery() for statement in statements]
+    joined = subqueries[0]
+    for subquery in subqueries[1:]:
+        # Every subquery is a single aggregate row
+        joined = joined.join(subquery, true())
+    row = db.session.execute(
+        select(*[column for subquery in subqueries for column in subquery.c]).select_from(joined)
+    ).one()
+    last_modified = max((value for value in row[0::3] if value is not None), default=None)
+    return last_modified, '-'.join(str(value) for value in row)
+
+def doctor_appointments_version(doctor_id: int):
+    return _version_select(Appointment, Appointment.doctor_id == doctor_id)
+
+def patient_appointments_version(user_id: int):
+    return _version_select(Appointment, Appointment.user_id == user_id)
+
+def patient_health_records_version(user_id: int):
+    patient_ids = select(PatientProfile.id).where(PatientProfile.user_id == user_id).scalar_subquery()
+    return _version_select(HealthRecord, HealthRecord.patient_id == patient_ids)
@@ -1,25 +1,76 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, Response, abort, stream_with_context
 from flask_login import login_required, current_user
 from backend.app import db
-from backend.app.models import User, Appointment, HealthRecord, DoctorProfile, PatientProfile
+from backend.app.models import User, Appointment, HealthRecord, DoctorProfile, PatientProfile, FileAttachment
+from backend.app.queries import doctor_appointments_query, patient_appointments_query, patient_health_records_query, \
+    doctor_stats, patient_stats, version_token, doctor_appointments_version, patient_appointments_version, \
+    patient_health_records_version, patient_metric_query, metric_readings, doctor_patient_ids, \
+    doctor_patient_profile_ids
+from backend.app.utils.conditional import conditional
+from backend.app.utils.appointment_events import get_event_broker, events_for_user, format_event
+from backend.app.utils.db_pool import pool_stats
+from backend.app.utils.db_routing import read_only, get_replica_set
+from backend.app.utils.extraction_cache import get_extraction_cache
+from backend.app.utils.notification_utils import get_notification_utils
+from backend.app.utils.response_cache import get_response_cache
+from backend.app.utils.pagination import paginate_keyset, page_args, InvalidCursor
+from backend.app.utils.record_export import iter_ndjson, iter_csv, iter_zip, gzip_chunks, CSV_SECTIONS
+from backend.app.utils.search_index import search_records, parse_query
+from backend.app.utils.sqlite_tuning import commit_with_retry
 from datetime import datetime
+from sqlalchemy.orm import joinedload
+import hmac
+import queue
+import time
 
 api_bp = Blueprint('api', __name__)
 
+def _has_patient_access(patient_user_id):
+    # Doctors only see records of patients who had an appointment with them
+    return Appointment.query.filter_by(
+        doctor_id=current_user.doctor_profile.id,
+        user_id=patient_user_id
+    ).first() is not None
+
+def _appointments_version():
+    if current_user.role == 'doctor':
+        return version_token(doctor_appointments_version(current_user.doctor_profile.id))
+    return version_token(patient_appointments_version(current_user.id))
+
+def _health_records_version():
+    if current_user.role == 'patient':
+        return version_token(patient_health_records_version(current_user.id))
+    patient_id = request.args.get('patient_id')
+    if not patient_id or not _has_patient_access(patient_id):
+        return None
+    return version_token(patient_health_records_version(patient_id))
+
+def _stats_version():
+    if current_user.role == 'doctor':
+        return version_token(doctor_appointments_version(current_user.doctor_profile.id))
+    return version_token(patient_appointments_version(current_user.id),
+                         patient_health_records_version(current_user.id))
+
+def _with_next_cursor(response, page):
+    # List bodies stay plain arrays; the cursor for the next page travels in a header
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    return response
+
 @api_bp.route('/appointments', methods=['GET'])
+@read_only
 @login_required
+@conditional(_appointments_version)
 def get_appointments():
     try:
+        cursor, limit = page_args()
         if current_user.role == 'doctor':
-            appointments = Appointment.query.filter_by(
-                doctor_id=current_user.doctor_profile.id
-            ).order_by(Appointment.appointment_date.desc()).all()
+            query = doctor_appointments_query(current_user.doctor_profile.id)
         else:
-            appointments = Appointment.query.filter_by(
-                user_id=current_user.id
-            ).order_by(Appointment.appointment_date.desc()).all()
+            query = patient_appointments_query(current_user.id)
+        page = paginate_keyset(query, Appointment.appointment_date, Appointment.id, cursor, limit)
         
-        return jsonify([{
+        return _with_next_cursor(jsonify([{
             'id': a.id,
             'date': a.appointment_date.isoformat(),
             'status': a.status,
@@ -27,41 +78,34 @@ def get_appointments():
             'patient': f"{a.user.first_name} {a.user.last_name}" if current_user.role == 'doctor' else None,
             'reason': a.reason,
             'notes': a.notes
-        } for a in appointments])
+        } for a in page.items]), page)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/health-records', methods=['GET'])
+@read_only
 @login_required
+@conditional(_health_records_version)
 def get_health_records():
     try:
+        cursor, limit = page_args()
         if current_user.role == 'patient':
-            records = HealthRecord.query.join(
-                HealthRecord.patient
-            ).filter_by(
-                user_id=current_user.id
-            ).order_by(HealthRecord.created_at.desc()).all()
+            query = patient_health_records_query(current_user.id)
         else:
             patient_id = request.args.get('patient_id')
             if not patient_id:
                 return jsonify({'error': 'Patient ID is required'}), 400
             
             # Verify doctor has access to patient records
-            has_appointment = Appointment.query.filter_by(
-                doctor_id=current_user.doctor_profile.id,
-                user_id=patient_id
-            ).first() is not None
-            
-            if not has_appointment:
+            if not _has_patient_access(patient_id):
                 return jsonify({'error': 'Access denied'}), 403
             
-            records = HealthRecord.query.join(
-                HealthRecord.patient
-            ).filter_by(
-                user_id=patient_id
-            ).order_by(HealthRecord.created_at.desc()).all()
+            query = patient_health_records_query(patient_id)
+        page = paginate_keyset(query, HealthRecord.created_at, HealthRecord.id, cursor, limit)
         
-        return jsonify([{
+        return _with_next_cursor(jsonify([{
             'id': r.id,
             'title': r.title,
             'type': r.record_type,
@@ -73,11 +117,306 @@ def get_health_records():
                 'file_type': a.file_type,
                 'uploaded_at': a.uploaded_at.isoformat()
             } for a in r.attachments]
-        } for r in records])
+        } for r in page.items]), page)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/health-metrics', methods=['GET'])
+@read_only
+@login_required
+def get_health_metrics():
+    """Time series of one extracted metric, optionally limited to [since, until)"""
+    metric = request.args.get('metric')
+    if not metric:
+        return jsonify({'error': 'metric is required'}), 400
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        since = datetime.fromisoformat(since) if since else None
+        until = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO 8601 dates'}), 400
+    
+    if current_user.role == 'patient':
+        user_id = current_user.id
+    else:
+        user_id = request.args.get('patient_id', type=int)
+        if not user_id:
+            return jsonify({'error': 'Patient ID is required'}), 400
+        if not _has_patient_access(user_id):
+            return jsonify({'error': 'Access denied'}), 403
+    
+    try:
+        return jsonify([{
+            'observed_at': m.observed_at.isoformat(),
+            'value': m.value,
+            'secondary_value': m.secondary_value,
+            'unit': m.unit,
+            'status': m.status,
+            'attachment_id': m.attachment_id
+        } for m in patient_metric_query(user_id, metric, since, until)])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _analysis_args():
+    """(since, metrics) from the query string; raises ValueError on a bad date"""
+    since = request.args.get('since')
+    metrics = [m for m in request.args.get('metrics', '').split(',') if m]
+    return (datetime.fromisoformat(since) if since else None), metrics
+
+def _analyze(user_ids, since, metrics):
+    # NumPy is imported on the first analysis, not in every worker at startup
+    from backend.utils.health_analysis import analyze_rows
+    return analyze_rows(
+        metric_readings(user_ids, since, metrics),
+        current_app.config['HEALTH_ANALYSIS_WINDOW'],
+        current_app.config['HEALTH_ANALYSIS_Z_THRESHOLD']
+    )
+
+@api_bp.route('/health-analysis', methods=['GET'])
+@read_only
+@login_required
+def get_health_analysis():
+    """Trends, rolling means, percentiles and anomalies of a patient's metrics"""
+    try:
+        since, metrics = _analysis_args()
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 date'}), 400
+    
+    if current_user.role == 'patient':
+        user_id = current_user.id
+    else:
+        user_id = request.args.get('patient_id', type=int)
+        if not user_id:
+            return jsonify({'error': 'Patient ID is required'}), 400
+        if not _has_patient_access(user_id):
+            return jsonify({'error': 'Access denied'}), 403
+    
+    try:
+        return jsonify(_analyze([user_id], since, metrics).get(user_id, {}))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/health-analysis/panel', methods=['GET'])
+@read_only
+@login_required
+def get_panel_analysis():
+    """The same analysis for every patient of the current doctor, keyed by patient id"""
+    if current_user.role != 'doctor':
+        return jsonify({'error': 'Access denied'}), 403
+    try:
+        since, metrics = _analysis_args()
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 date'}), 400
+    
+    try:
+        panel = _analyze(doctor_patient_ids(current_user.doctor_profile.id), since, metrics)
+        return jsonify({str(user_id): analysis for user_id, analysis in panel.items()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/search', methods=['GET'])
+@read_only
+@login_required
+def search_health_records():
+    """Ranked full-text search over the health records the current user may see"""
+    query = request.args.get('q', '')
+    if not parse_query(query):
+        return jsonify({'error': 'q is required'}), 400
+    limit = max(1, min(request.args.get('limit', current_app.config['PAGE_SIZE'], type=int),
+                       current_app.config['PAGE_SIZE_MAX']))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    
+    if current_user.role == 'patient':
+        patient_ids = [current_user.patient_profile.id]
+    else:
+        patient_user_id = request.args.get('patient_id', type=int)
+        if patient_user_id:
+            if not _has_patient_access(patient_user_id):
+                return jsonify({'error': 'Access denied'}), 403
+            patient_ids = db.session.query(PatientProfile.id).filter_by(user_id=patient_user_id).scalar_subquery()
+        else:
+            patient_ids = doctor_patient_profile_ids(current_user.doctor_profile.id)
+    
+    try:
+        matches = search_records(db.session, query, patient_ids, limit, offset)
+        records = {r.id: r for r in HealthRecord.query.filter(
+            HealthRecord.id.in_([m[0] for m in matches])
+        ).options(joinedload(HealthRecord.patient).joinedload(PatientProfile.user))} if matches else {}
+        return jsonify([{
+            'id': record_id,
+            'title': records[record_id].title,
+            'type': records[record_id].record_type,
+            'created_at': records[record_id].created_at.isoformat(),
+            'patient': f"{records[record_id].patient.user.first_name} {records[record_id].patient.user.last_name}"
+                       if current_user.role == 'doctor' else None,
+            'patient_id': records[record_id].patient.user_id if current_user.role == 'doctor' else None,
+            'score': round(score, 4),
+            'snippet': snippet
+        } for record_id, score, snippet in matches if record_id in records])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/export', methods=['GET'])
+@read_only
+@login_required
+def export_records():
+    """Stream a patient's appointments and health records as NDJSON, CSV or zip"""
+    if current_user.role == 'patient':
+        user_id = current_user.id
+    else:
+        user_id = request.args.get('patient_id', type=int)
+        if not user_id:
+            return jsonify({'error': 'Patient ID is required'}), 400
+        if not _has_patient_access(user_id):
+            return jsonify({'error': 'Access denied'}), 403
+    
+    export_format = request.args.get('format', 'ndjson')
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    chunk_size = current_app.config['EXPORT_CHUNK_SIZE']
+    filename = f"health-record-{user_id}-{datetime.utcnow():%Y%m%d}"
+    if export_format == 'ndjson':
+        chunks = iter_ndjson(user_id, batch_size, chunk_size)
+        mimetype, filename = 'application/x-ndjson', filename + '.ndjson'
+    elif export_format == 'csv':
+        section = request.args.get('section', 'health_records')
+        if section not in CSV_SECTIONS:
+            return jsonify({'error': f"section must be one of {', '.join(CSV_SECTIONS)}"}), 400
+        chunks = iter_csv(user_id, section, batch_size, chunk_size)
+        mimetype, filename = 'text/csv', f"{filename}-{section}.csv"
+    elif export_format == 'zip':
+        # Attachments are already compressed formats, so gzip adds nothing on top
+        chunks = iter_zip(user_id, batch_size, chunk_size)
+        mimetype, filename = 'application/zip', filename + '.zip'
+    else:
+        return jsonify({'error': 'format must be ndjson, csv or zip'}), 400
+    
+    if export_format != 'zip' and request.args.get('gzip', 'false').lower() in ('1', 'true'):
+        chunks = gzip_chunks(chunks)
+        mimetype, filename = 'application/gzip', filename + '.gz'
+    
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no'
+    })
+
+@api_bp.route('/appointments/<int:id>/status', methods=['POST'])
+@login_required
+def update_appointment_status(id):
+    if current_user.role != 'doctor':
+        return jsonify({'success': False, 'error': 'Access denied'}), 403
+    appointment = Appointment.query.get_or_404(id)
+    if appointment.doctor_id != current_user.doctor_profile.id:
+        return jsonify({'success': False, 'error': 'Access denied'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    status = data.get('status')
+    if status not in ('scheduled', 'completed', 'cancelled'):
+        return jsonify({'success': False, 'error': 'Invalid status'}), 400
+    
+    def update():
+        appointment.status = status
+        if 'notes' in data:
+            appointment.notes = data['notes']
+    
+    try:
+        commit_with_retry(db.session, update)
+        
+        if status == 'completed':
+            get_notification_utils().send_email(
+                appointment.user.email,
+                'Appointment Completed',
+                f'Your appointment with Dr. {current_user.first_name} {current_user.last_name} has been completed. Please check your health records for any updates.'
+            )
+        return jsonify({'success': True, 'status': appointment.status})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/events', methods=['GET'])
+@login_required
+def appointment_events():
+    """Server-Sent Events stream of appointment changes for the current user"""
+    user_id = current_user.id
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        last_event_id = 0
+    
+    heartbeat = current_app.config['EVENTS_HEARTBEAT_INTERVAL']
+    timeout = current_app.config['EVENTS_STREAM_TIMEOUT']
+    broker = get_event_broker()
+    # Subscribe before replaying so nothing committed in between is missed
+    subscriber = broker.subscribe(user_id)
+    backlog = [(e.id, format_event(e)) for e in
+               events_for_user(user_id, last_event_id, current_app.config['EVENTS_REPLAY_LIMIT'])]
+    
+    def stream():
+        replayed = set()
+        deadline = time.monotonic() + timeout
+        try:
+            yield retry_line
+            for event_id, message in backlog:
+                replayed.add(event_id)
+                yield message
+            while time.monotonic() < deadline:
+                try:
+                    item = subscriber.get(timeout=min(heartbeat, max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                if item is None:
+                    return  # fell behind; the client reconnects and resumes from Last-Event-ID
+                event_id, message = item
+                if event_id > last_event_id and event_id not in replayed:
+                    yield message
+        finally:
+            broker.unsubscribe(user_id, subscriber)
+    
+    retry_line = f"retry: {current_app.config['EVENTS_RETRY_MS']}\n\n"
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@api_bp.route('/attachments/<int:id>/status', methods=['GET'])
+@login_required
+def get_attachment_status(id):
+    attachment = FileAttachment.query.get_or_404(id)
+    try:
+        patient_user_id = attachment.health_record.patient.user_id
+        
+        if current_user.role == 'patient':
+            if patient_user_id != current_user.id:
+                return jsonify({'error': 'Access denied'}), 403
+        else:
+            # Verify doctor has access to patient records
+            has_appointment = Appointment.query.filter_by(
+                doctor_id=current_user.doctor_profile.id,
+                user_id=patient_user_id
+            ).first() is not None
+            
+            if not has_appointment:
+                return jsonify({'error': 'Access denied'}), 403
+        
+        return jsonify({
+            'id': attachment.id,
+            'status': attachment.extraction_status,
+            'attempts': attachment.extraction_attempts,
+            'error': attachment.extraction_error if attachment.extraction_status == 'failed' else None,
+            'started_at': attachment.extraction_started_at.isoformat() if attachment.extraction_started_at else None,
+            'extracted_at': attachment.extracted_at.isoformat() if attachment.extracted_at else None,
+            'extracted_data': attachment.extracted_data if attachment.extraction_status == 'completed' else None
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/doctors', methods=['GET'])
+@read_only
 @login_required
 def get_doctors():
     try:
@@ -91,85 +430,139 @@ def get_doctors():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _profile_data(user):
+    profile = {
+        'id': user.id,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'role': user.role,
+        'created_at': user.created_at.isoformat()
+    }
+    
+    if user.role == 'doctor':
+        doctor_profile = user.doctor_profile
+        profile.update({
+            'specialty': doctor_profile.specialty,
+            'license_number': doctor_profile.license_number,
+            'office_hours': doctor_profile.office_hours
+        })
+    else:
+        patient_profile = user.patient_profile
+        profile.update({
+            'date_of_birth': patient_profile.date_of_birth.isoformat(),
+            'blood_type': patient_profile.blood_type,
+            'allergies': patient_profile.allergies,
+            'medical_history': patient_profile.medical_history,
+            'emergency_contact': patient_profile.emergency_contact
+        })
+    
+    return profile
+
 @api_bp.route('/profile', methods=['GET'])
 @login_required
 def get_profile():
     try:
-        profile = {
-            'id': current_user.id,
-            'email': current_user.email,
-            'first_name': current_user.first_name,
-            'last_name': current_user.last_name,
-            'role': current_user.role,
-            'created_at': current_user.created_at.isoformat()
-        }
-        
-        if current_user.role == 'doctor':
-            doctor_profile = current_user.doctor_profile
-            profile.update({
-                'specialty': doctor_profile.specialty,
-                'license_number': doctor_profile.license_number,
-                'office_hours': doctor_profile.office_hours
-            })
-        else:
-            patient_profile = current_user.patient_profile
-            profile.update({
-                'date_of_birth': patient_profile.date_of_birth.isoformat(),
-                'blood_type': patient_profile.blood_type,
-                'allergies': patient_profile.allergies,
-                'medical_history': patient_profile.medical_history,
-                'emergency_contact': patient_profile.emergency_contact
-            })
-        
+        profile = get_response_cache().get_or_set(
+            current_user.id, 'profile', lambda: _profile_data(current_user)
+        )
         return jsonify(profile)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/stats', methods=['GET'])
+@read_only
 @login_required
+@conditional(_stats_version)
 def get_stats():
     try:
         if current_user.role == 'doctor':
-            total_patients = User.query.join(Appointment).filter(
-                Appointment.doctor_id == current_user.doctor_profile.id
-            ).distinct().count()
-            
-            total_appointments = Appointment.query.filter_by(
-                doctor_id=current_user.doctor_profile.id
-            ).count()
-            
-            completed_appointments = Appointment.query.filter_by(
-                doctor_id=current_user.doctor_profile.id,
-                status='completed'
-            ).count()
-            
+            stats = doctor_stats(current_user.doctor_profile.id)
+            total = stats['total_appointments']
             return jsonify({
-                'total_patients': total_patients,
-                'total_appointments': total_appointments,
-                'completed_appointments': completed_appointments,
-                'completion_rate': round(completed_appointments / total_appointments * 100, 2) if total_appointments > 0 else 0
+                'total_patients': stats['total_patients'],
+                'total_appointments': total,
+                'completed_appointments': stats['completed_appointments'],
+                'completion_rate': round(stats['completed_appointments'] / total * 100, 2) if total > 0 else 0
             })
         else:
-            total_appointments = Appointment.query.filter_by(
-                user_id=current_user.id
-            ).count()
-            
-            completed_appointments = Appointment.query.filter_by(
-                user_id=current_user.id,
-                status='completed'
-            ).count()
-            
-            total_records = HealthRecord.query.join(
-                HealthRecord.patient
-            ).filter_by(
-                user_id=current_user.id
-            ).count()
-            
+            stats = patient_stats(current_user.id)
+            total = stats['total_appointments']
             return jsonify({
-                'total_appointments': total_appointments,
-                'completed_appointments': completed_appointments,
-                'total_records': total_records,
-                'attendance_rate': round(completed_appointments / total_appointments * 100, 2) if total_appointments > 0 else 0
+                'total_appointments': total,
+                'completed_appointments': stats['completed_appointments'],
+                'total_records': stats['total_records'],
+                'attendance_rate': round(stats['completed_appointments'] / total * 100, 2) if total > 0 else 0
             })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500 
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    # Closed unless a scrape token is configured
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    
+    cache = get_extraction_cache().stats()
+    lines = [
+        '# HELP extraction_cache_hits_total Document analyses served from the extraction cache.',
+        '# TYPE extraction_cache_hits_total counter',
+        f"extraction_cache_hits_total {cache['hits']}",
+        '# HELP extraction_cache_misses_total Document analyses that had to run OCR/PDF extraction.',
+        '# TYPE extraction_cache_misses_total counter',
+        f"extraction_cache_misses_total {cache['misses']}",
+        '# HELP extraction_cache_evictions_total Cache entries evicted to stay under the size limit.',
+        '# TYPE extraction_cache_evictions_total counter',
+        f"extraction_cache_evictions_total {cache['evictions']}",
+        '# HELP extraction_cache_entries Entries currently stored in the extraction cache.',
+        '# TYPE extraction_cache_entries gauge',
+        f"extraction_cache_entries {cache['entries']}",
+        '# HELP extraction_cache_bytes Bytes of analyses currently stored in the extraction cache.',
+        '# TYPE extraction_cache_bytes gauge',
+        f"extraction_cache_bytes {cache['bytes']}",
+    ]
+    replicas = get_replica_set()
+    if replicas is not None:
+        lines += [
+            '# HELP db_replica_healthy Whether a read replica passed its last health check.',
+            '# TYPE db_replica_healthy gauge',
+        ] + [f'db_replica_healthy{{replica="{i}"}} {int(bool(healthy))}'
+             for i, (url, healthy) in enumerate(replicas.status())]
+    pool = pool_stats(db.engine)
+    if pool:
+        lines += [
+            '# HELP db_pool_size Connections kept open by this process\'s pool.',
+            '# TYPE db_pool_size gauge',
+            f"db_pool_size {pool['size']}",
+            '# HELP db_pool_checked_out Connections currently in use.',
+            '# TYPE db_pool_checked_out gauge',
+            f"db_pool_checked_out {pool['checked_out']}",
+            '# HELP db_pool_checked_in Idle connections waiting in the pool.',
+            '# TYPE db_pool_checked_in gauge',
+            f"db_pool_checked_in {pool['checked_in']}",
+            '# HELP db_pool_overflow Connections open beyond the pool size.',
+            '# TYPE db_pool_overflow gauge',
+            f"db_pool_overflow {pool['overflow']}",
+            '# HELP db_pool_checkouts_total Connections handed out by the pool.',
+            '# TYPE db_pool_checkouts_total counter',
+            f"db_pool_checkouts_total {pool['checkouts']}",
+            '# HELP db_pool_checkout_wait_seconds_total Time spent waiting for connections, including connects and pre-pings.',
+            '# TYPE db_pool_checkout_wait_seconds_total counter',
+            f"db_pool_checkout_wait_seconds_total {pool['wait_seconds']:.6f}",
+            '# HELP db_pool_checkout_wait_seconds_max Longest wait for a connection since the process started.',
+            '# TYPE db_pool_checkout_wait_seconds_max gauge',
+            f"db_pool_checkout_wait_seconds_max {pool['max_wait_seconds']:.6f}",
+            '# HELP db_pool_timeouts_total Checkouts that gave up after DB_POOL_TIMEOUT.',
+            '# TYPE db_pool_timeouts_total counter',
+            f"db_pool_timeouts_total {pool['timeouts']}",
+            '# HELP db_pool_connects_total New database connections opened.',
+            '# TYPE db_pool_connects_total counter',
+            f"db_pool_connects_total {pool['connects']}",
+            '# HELP db_pool_invalidations_total Connections discarded as stale or broken.',
+            '# TYPE db_pool_invalidations_total counter',
+            f"db_pool_invalidations_total {pool['invalidations']}",
+        ]
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
@@ -2,8 +2,13 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import current_user, login_required
 from backend.app import db
 from backend.app.models import User, Appointment, HealthRecord, PatientProfile
+from backend.app.queries import doctor_appointments_query, doctor_stats
+from backend.app.utils.pagination import paginate_keyset, page_args, InvalidCursor
 from backend.app.forms.doctor import AppointmentNoteForm, HealthRecordForm, DoctorProfileForm
 from backend.app.utils.notification_utils import get_notification_utils
+from backend.app.utils.response_cache import get_response_cache
+from backend.app.utils.sqlite_tuning import commit_with_retry
+from backend.app.utils.db_routing import read_only
 from datetime import datetime, timedelta
 from functools import wraps
 
@@ -20,38 +25,68 @@ def doctor_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@doctor_bp.route('/dashboard')
-@doctor_required
-def dashboard():
+def _dashboard_appointment(appointment):
+    # Plain data so the dashboard can be cached outside the session
+    return {
+        'id': appointment.id,
+        'appointment_date': appointment.appointment_date,
+        'status': appointment.status,
+        'reason': appointment.reason,
+        'user': {
+            'id': appointment.user.id,
+            'first_name': appointment.user.first_name,
+            'last_name': appointment.user.last_name
+        }
+    }
+
+def _dashboard_data(doctor_id, today):
     # Get today's appointments
-    today = datetime.now().date()
-    today_appointments = Appointment.query.filter(
-        Appointment.doctor_id == current_user.doctor_profile.id,
+    today_appointments = doctor_appointments_query(doctor_id).filter(
         Appointment.appointment_date >= today,
         Appointment.appointment_date < today + timedelta(days=1)
     ).order_by(Appointment.appointment_date).all()
     
     # Get upcoming appointments
-    upcoming_appointments = Appointment.query.filter(
-        Appointment.doctor_id == current_user.doctor_profile.id,
+    upcoming_appointments = doctor_appointments_query(doctor_id).filter(
         Appointment.appointment_date >= today + timedelta(days=1),
         Appointment.status == 'scheduled'
     ).order_by(Appointment.appointment_date).limit(5).all()
     
+    return {
+        'today_appointments': [_dashboard_appointment(a) for a in today_appointments],
+        'upcoming_appointments': [_dashboard_appointment(a) for a in upcoming_appointments]
+    }
+
+@doctor_bp.route('/dashboard')
+@read_only
+@doctor_required
+def dashboard():
+    today = datetime.now().date()
+    data = get_response_cache().get_or_set(
+        current_user.id, f'doctor_dashboard:{today.isoformat()}',
+        lambda: _dashboard_data(current_user.doctor_profile.id, today)
+    )
+    
     return render_template('doctor/dashboard.html',
                          title='Doctor Dashboard',
-                         today_appointments=today_appointments,
-                         upcoming_appointments=upcoming_appointments)
+                         today_appointments=data['today_appointments'],
+                         upcoming_appointments=data['upcoming_appointments'])
 
 @doctor_bp.route('/appointments')
+@read_only
 @doctor_required
 def appointments():
-    appointments = Appointment.query.filter_by(
-        doctor_id=current_user.doctor_profile.id
-    ).order_by(Appointment.appointment_date.desc()).all()
+    cursor, limit = page_args()
+    try:
+        page = paginate_keyset(doctor_appointments_query(current_user.doctor_profile.id),
+                               Appointment.appointment_date, Appointment.id, cursor, limit)
+    except InvalidCursor:
+        return redirect(url_for('doctor.appointments'))
     return render_template('doctor/appointments.html',
                          title='My Appointments',
-                         appointments=appointments)
+                         appointments=page.items,
+                         next_cursor=page.next_cursor,
+                         paged=cursor is not None)
 
 @doctor_bp.route('/appointment/<int:id>', methods=['GET', 'POST'])
 @doctor_required
@@ -63,9 +98,10 @@ def appointment_detail(id):
     
     form = AppointmentNoteForm()
     if form.validate_on_submit():
-        appointment.notes = form.notes.data
-        appointment.status = form.status.data
-        db.session.commit()
+        def update():
+            appointment.notes = form.notes.data
+            appointment.status = form.status.data
+        commit_with_retry(db.session, update)
         
         # Send notification if appointment is completed
         if form.status.data == 'completed':
@@ -89,6 +125,7 @@ def appointment_detail(id):
                          form=form)
 
 @doctor_bp.route('/patients')
+@read_only
 @doctor_required
 def patients():
     # Get unique patients who have appointments with this doctor
@@ -100,6 +137,7 @@ def patients():
                          patients=patients)
 
 @doctor_bp.route('/patient/<int:id>')
+@read_only
 @doctor_required
 def patient_detail(id):
     patient = User.query.get_or_404(id)
@@ -202,32 +240,12 @@ def profile():
         form.hospital_affiliation.data = current_user.doctor_profile.hospital_affiliation
 
     # Get statistics for the doctor
-    total_patients = User.query.join(Appointment).filter(
-        Appointment.doctor_id == current_user.doctor_profile.id
-    ).distinct().count()
-
-    total_appointments = Appointment.query.filter_by(
-        doctor_id=current_user.doctor_profile.id
-    ).count()
-
-    # Get appointments for the current month
-    today = datetime.now()
-    first_day = today.replace(day=1)
-    if today.month == 12:
-        next_month = today.replace(year=today.year + 1, month=1, day=1)
-    else:
-        next_month = today.replace(month=today.month + 1, day=1)
-    
-    appointments_this_month = Appointment.query.filter(
-        Appointment.doctor_id == current_user.doctor_profile.id,
-        Appointment.appointment_date >= first_day,
-        Appointment.appointment_date < next_month
-    ).count()
+    stats = doctor_stats(current_user.doctor_profile.id)
 
     return render_template('doctor/profile.html',
                          title='My Profile',
                          doctor=current_user,
                          form=form,
-                         total_patients=total_patients,
-                         total_appointments=total_appointments,
-                         appointments_this_month=appointments_this_month) 
\ No newline at end of file
+                         total_patients=stats['total_patients'],
+                         total_appointments=stats['total_appointments'],
+                         appointments_this_month=stats['appointments_this_month']) 
\ No newline at end of file
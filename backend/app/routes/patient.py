@@ -2,9 +2,16 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import current_user, login_required
 from backend.app import db
 from backend.app.models import User, Appointment, HealthRecord, DoctorProfile, FileAttachment
+from backend.app.queries import patient_appointments_query, patient_health_records_query
+from backend.app.utils.pagination import paginate_keyset, page_args, InvalidCursor
 from backend.app.forms.patient import AppointmentForm, HealthRecordForm, ProfileForm
-from backend.app.utils.file_processor import get_file_processor
+from backend.app.utils.extraction_queue import get_extraction_queue
 from backend.app.utils.notification_utils import get_notification_utils
+from backend.app.utils.reminder_scheduler import get_reminder_scheduler
+from backend.app.utils.response_cache import get_response_cache
+from backend.app.utils.sqlite_tuning import commit_with_retry
+from backend.app.utils.db_routing import read_only
+from backend.utils.ingestion import ingest_upload, UploadTooLarge, UnsupportedFileType
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
@@ -23,32 +30,53 @@ def patient_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@patient_bp.route('/dashboard')
-@patient_required
-def dashboard():
+def _dashboard_data(user_id):
     # Get upcoming appointments
-    upcoming_appointments = Appointment.query.filter_by(
-        user_id=current_user.id,
-        status='scheduled'
+    upcoming_appointments = patient_appointments_query(user_id).filter(
+        Appointment.status == 'scheduled'
     ).order_by(Appointment.appointment_date).limit(5).all()
     
     # Get recent health records
-    recent_records = HealthRecord.query.join(
-        HealthRecord.patient
-    ).filter_by(
-        user_id=current_user.id
+    recent_records = patient_health_records_query(
+        user_id, with_attachments=False
     ).order_by(HealthRecord.created_at.desc()).limit(5).all()
     
+    # Plain data so the dashboard can be cached outside the session
+    return {
+        'appointments': [{
+            'id': a.id,
+            'appointment_date': a.appointment_date,
+            'status': a.status,
+            'reason': a.reason,
+            'doctor': {'user': {'first_name': a.doctor.user.first_name, 'last_name': a.doctor.user.last_name}}
+        } for a in upcoming_appointments],
+        'records': [{
+            'id': r.id,
+            'title': r.title,
+            'record_type': r.record_type,
+            'created_at': r.created_at
+        } for r in recent_records]
+    }
+
+@patient_bp.route('/dashboard')
+@read_only
+@patient_required
+def dashboard():
+    data = get_response_cache().get_or_set(
+        current_user.id, 'patient_dashboard', lambda: _dashboard_data(current_user.id)
+    )
+    
     return render_template('patient/dashboard.html',
                          title='Patient Dashboard',
-                         appointments=upcoming_appointments,
-                         records=recent_records)
+                         appointments=data['appointments'],
+                         records=data['records'])
 
 @patient_bp.route('/appointments')
+@read_only
 @patient_required
 def appointments():
-    appointments = Appointment.query.filter_by(
-        user_id=current_user.id
+    appointments = patient_appointments_query(
+        current_user.id
     ).order_by(Appointment.appointment_date.desc()).all()
     return render_template('patient/appointments.html',
                          title='My Appointments',
@@ -63,15 +91,18 @@ def book_appointment():
     form.doctor.choices = [(d.id, f"Dr. {d.user.first_name} {d.user.last_name} - {d.specialty}") for d in doctors]
     
     if form.validate_on_submit():
-        appointment = Appointment(
-            user_id=current_user.id,
-            doctor_id=form.doctor.data,
-            appointment_date=form.appointment_date.data,
-            reason=form.reason.data,
-            status='scheduled'
-        )
-        db.session.add(appointment)
-        db.session.commit()
+        def book():
+            appointment = Appointment(
+                user_id=current_user.id,
+                doctor_id=form.doctor.data,
+                appointment_date=form.appointment_date.data,
+                reason=form.reason.data,
+                status='scheduled'
+            )
+            db.session.add(appointment)
+            return appointment
+        # Concurrent bookings on SQLite can find the database locked; retry those
+        appointment = commit_with_retry(db.session, book)
         
         # Send notification
         doctor = DoctorProfile.query.get(form.doctor.data)
@@ -81,6 +112,8 @@ def book_appointment():
             f"Dr. {doctor.user.first_name} {doctor.user.last_name}",
             form.appointment_date.data.strftime("%Y-%m-%d %H:%M")
         )
+        if notification.email_enabled:
+            get_reminder_scheduler().schedule(appointment)
         
         flash('Appointment booked successfully!', 'success')
         return redirect(url_for('patient.appointments'))
@@ -90,16 +123,20 @@ def book_appointment():
                          form=form)
 
 @patient_bp.route('/health-records')
+@read_only
 @patient_required
 def health_records():
-    records = HealthRecord.query.join(
-        HealthRecord.patient
-    ).filter_by(
-        user_id=current_user.id
-    ).order_by(HealthRecord.created_at.desc()).all()
+    cursor, limit = page_args()
+    try:
+        page = paginate_keyset(patient_health_records_query(current_user.id, with_attachments=False, with_doctor=True),
+                               HealthRecord.created_at, HealthRecord.id, cursor, limit)
+    except InvalidCursor:
+        return redirect(url_for('patient.health_records'))
     return render_template('patient/health_records.html',
                          title='My Health Records',
-                         records=records)
+                         records=page.items,
+                         next_cursor=page.next_cursor,
+                         paged=cursor is not None)
 
 @patient_bp.route('/upload-record', methods=['GET', 'POST'])
 @patient_required
@@ -109,13 +146,18 @@ def upload_record():
         if form.file.data:
             file = form.file.data
             filename = secure_filename(file.filename)
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
             
-            # Process file
-            processor = get_file_processor()
-            extracted_data = processor.process_pdf(file_path) if filename.endswith('.pdf') \
-                else processor.process_image(file_path)
+            # Encrypt the upload to storage in a single streaming pass
+            try:
+                ingested = ingest_upload(
+                    file.stream,
+                    current_app.config['UPLOAD_FOLDER'],
+                    str(current_user.id),
+                    current_app.config['MAX_CONTENT_LENGTH']
+                )
+            except (UploadTooLarge, UnsupportedFileType) as e:
+                flash(str(e), 'danger')
+                return redirect(url_for('patient.upload_record'))
             
             # Create health record
             record = HealthRecord(
@@ -130,14 +172,19 @@ def upload_record():
             attachment = FileAttachment(
                 health_record=record,
                 filename=filename,
-                file_type=file.content_type,
-                file_path=file_path,
-                extracted_data=extracted_data
+                file_type=ingested.mime_type,
+                file_path=ingested.path,
+                file_size=ingested.size,
+                content_hash=ingested.content_hash,
+                extraction_status='pending'
             )
             db.session.add(attachment)
             db.session.commit()
             
-            flash('Health record uploaded successfully!', 'success')
+            # Extract health metrics in the background
+            get_extraction_queue().enqueue(attachment.id)
+            
+            flash('Health record uploaded successfully! Document analysis is in progress.', 'success')
             return redirect(url_for('patient.health_records'))
     
     return render_template('patient/upload_record.html',
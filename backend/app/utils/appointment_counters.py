@@ -0,0 +1,157 @@
+from collections import Counter
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select, func, case, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from backend.app import db
+from backend.app.models import Appointment, AppointmentCounter
+
+PERIOD_ALL = 'all'
+
+_COUNTED_COLUMNS = ('doctor_id', 'user_id', 'appointment_date', 'status')
+
+def period_of(value: datetime) -> str:
+    return value.strftime('%Y-%m')
+
+def counters_enabled() -> bool:
+    return has_app_context() and current_app.config.get('APPOINTMENT_COUNTERS_ENABLED', False)
+
+def _contributions(rows) -> Counter:
+    """(scope, owner_id, period, field) -> count for the given appointment rows"""
+    counts = Counter()
+    for doctor_id, user_id, appointment_date, status in rows:
+        periods = [PERIOD_ALL] + ([period_of(appointment_date)] if appointment_date else [])
+        for scope, owner_id in (('doctor', doctor_id), ('patient', user_id)):
+            if owner_id is None:
+                continue
+            for period in periods:
+                counts[(scope, owner_id, period, 'total')] += 1
+                if status == 'completed':
+                    counts[(scope, owner_id, period, 'completed')] += 1
+    return counts
+
+def _load_rows(connection, ids) -> list:
+    if not ids:
+        return []
+    return connection.execute(
+        select(Appointment.doctor_id, Appointment.user_id, Appointment.appointment_date, Appointment.status)
+        .where(Appointment.id.in_(ids))
+    ).all()
+
+def _changed_appointments(session) -> list:
+    """Persistent appointments whose counted columns were modified"""
+    return [obj for obj in session.dirty
+            if isinstance(obj, Appointment)
+            and any(inspect(obj).attrs[name].history.has_changes() for name in _COUNTED_COLUMNS)]
+
+def _before_flush(session, flush_context, instances):
+    if not counters_enabled():
+        return
+    changed = _changed_appointments(session)
+    deleted = [obj for obj in session.deleted if isinstance(obj, Appointment)]
+    # Read the stored values before the flush overwrites them
+    session.info['appointment_counters_old'] = _load_rows(session.connection(), [obj.id for obj in changed + deleted])
+    session.info['appointment_counters_new'] = [obj for obj in session.new if isinstance(obj, Appointment)] + changed
+
+def _after_flush(session, flush_context):
+    old_rows = session.info.pop('appointment_counters_old', None)
+    new_objects = session.info.pop('appointment_counters_new', None)
+    if old_rows is None or not (old_rows or new_objects):
+        return
+    connection = session.connection()
+    deltas = _contributions(_load_rows(connection, [obj.id for obj in new_objects]))
+    deltas.subtract(_contributions(old_rows))
+    apply_deltas(connection, deltas)
+
+def apply_deltas(connection, deltas: Counter):
+    """Add counter deltas inside the caller's transaction"""
+    merged = {}
+    for (scope, owner_id, period, field), delta in deltas.items():
+        if delta:
+            merged.setdefault((scope, owner_id, period), {'total': 0, 'completed': 0})[field] += delta
+    if not merged:
+        return
+
+    table = AppointmentCounter.__table__
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    for (scope, owner_id, period), values in merged.items():
+        statement = dialect.insert(table).values(scope=scope, owner_id=owner_id, period=period, **values)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.scope, table.c.owner_id, table.c.period],
+            set_={
+                'total': table.c.total + statement.excluded.total,
+                'completed': table.c.completed + statement.excluded.completed
+            }
+        ))
+
+def init_appointment_counters(session):
+    """Maintain appointment_counters from the session's flushes.
+
+    Counts are adjusted in the same transaction as the appointment change,
+    so they commit or roll back together with it. The listeners are no-ops
+    unless APPOINTMENT_COUNTERS_ENABLED is set.
+    """
+    if not event.contains(session, 'before_flush', _before_flush):
+        event.listen(session, 'before_flush', _before_flush)
+        event.listen(session, 'after_flush', _after_flush)
+
+def read_counters(scope: str, owner_id: int, period: str, *extra) -> tuple:
+    """(total, completed, total in ``period``, *extra) from the stored counters.
+
+    ``extra`` scalar subqueries are evaluated in the same statement, so
+    callers get everything they need in one round trip.
+    """
+    table = AppointmentCounter.__table__
+    overall = table.c.period == PERIOD_ALL
+    row = db.session.execute(
+        select(
+            func.coalesce(func.sum(case((overall, table.c.total), else_=0)), 0),
+            func.coalesce(func.sum(case((overall, table.c.completed), else_=0)), 0),
+            func.coalesce(func.sum(case((table.c.period == period, table.c.total), else_=0)), 0),
+            *extra
+        ).where(
+            table.c.scope == scope,
+            table.c.owner_id == owner_id,
+            table.c.period.in_([PERIOD_ALL, period])
+        )
+    ).one()
+    return tuple(row)
+
+def expected_counters(connection) -> dict:
+    """Counters recomputed from the appointments table with grouped aggregates"""
+    completed = func.sum(case((Appointment.status == 'completed', 1), else_=0))
+    month = func.strftime('%Y-%m', Appointment.appointment_date) if connection.dialect.name == 'sqlite' \
+        else func.to_char(Appointment.appointment_date, 'YYYY-MM')
+
+    expected = {}
+    for scope, owner in (('doctor', Appointment.doctor_id), ('patient', Appointment.user_id)):
+        for period in (None, month):
+            rows = connection.execute(
+                select(owner, literal(PERIOD_ALL) if period is None else period, func.count(), completed)
+                .where(owner.isnot(None))
+                .group_by(*([owner] if period is None else [owner, period]))
+            ).all()
+            for owner_id, period_value, total, done in rows:
+                if period_value is not None:
+                    expected[(scope, owner_id, period_value)] = (total, done or 0)
+    return expected
+
+def stored_counters(connection) -> dict:
+    table = AppointmentCounter.__table__
+    return {
+        (row.scope, row.owner_id, row.period): (row.total, row.completed)
+        for row in connection.execute(select(table))
+        if row.total or row.completed
+    }
+
+def rebuild_counters(connection) -> int:
+    """Replace every stored counter with freshly aggregated values"""
+    table = AppointmentCounter.__table__
+    expected = expected_counters(connection)
+    connection.execute(table.delete())
+    if expected:
+        connection.execute(table.insert(), [
+            {'scope': scope, 'owner_id': owner_id, 'period': period, 'total': total, 'completed': done}
+            for (scope, owner_id, period), (total, done) in expected.items()
+        ])
+    return len(expected)
@@ -0,0 +1,208 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, inspect, select, delete, text, or_
+import json
+import os
+import queue
+import select as select_module
+import threading
+from backend.app import db
+from backend.app.models import Appointment, AppointmentEvent, DoctorProfile
+
+NOTIFY_CHANNEL = 'appointment_events'
+_LOOKBACK_IDS = 100
+
+def _payload(appointment: Appointment) -> dict:
+    return {
+        'appointment_id': appointment.id,
+        'status': appointment.status,
+        'notes': appointment.notes,
+        'reason': appointment.reason,
+        'appointment_date': appointment.appointment_date.isoformat() if appointment.appointment_date else None
+    }
+
+def _changed_types(appointment: Appointment) -> list:
+    state = inspect(appointment)
+    return [event_type for event_type, attr in (('status', 'status'), ('notes', 'notes'))
+            if state.attrs[attr].history.has_changes()]
+
+def _after_flush(session, flush_context):
+    events = [(obj, 'created') for obj in session.new if isinstance(obj, Appointment)]
+    for obj in session.dirty:
+        if isinstance(obj, Appointment):
+            events += [(obj, event_type) for event_type in _changed_types(obj)]
+    if not events:
+        return
+
+    connection = session.connection()
+    doctor_ids = {obj.doctor_id for obj, _ in events if obj.doctor_id is not None}
+    doctor_users = dict(connection.execute(
+        select(DoctorProfile.id, DoctorProfile.user_id).where(DoctorProfile.id.in_(doctor_ids))
+    ).all()) if doctor_ids else {}
+
+    connection.execute(AppointmentEvent.__table__.insert(), [{
+        'appointment_id': obj.id,
+        'patient_user_id': obj.user_id,
+        'doctor_user_id': doctor_users.get(obj.doctor_id),
+        'event_type': event_type,
+        'payload': dict(_payload(obj), type=event_type),
+        'created_at': datetime.utcnow()
+    } for obj, event_type in events])
+    if connection.dialect.name == 'postgresql':
+        # Delivered to listeners when the transaction commits
+        connection.execute(text("SELECT pg_notify(:channel, '')"), {'channel': NOTIFY_CHANNEL})
+
+def init_appointment_events(session):
+    """Record created/status/notes events in the same transaction as the change"""
+    if not event.contains(session, 'after_flush', _after_flush):
+        event.listen(session, 'after_flush', _after_flush)
+
+def events_for_user(user_id: int, after_id: int, limit: int) -> list:
+    """Stored events visible to a user, oldest first, for Last-Event-ID resume"""
+    return AppointmentEvent.query.filter(
+        AppointmentEvent.id > after_id,
+        or_(AppointmentEvent.patient_user_id == user_id, AppointmentEvent.doctor_user_id == user_id)
+    ).order_by(AppointmentEvent.id).limit(limit).all()
+
+def format_event(appointment_event) -> str:
+    return (f"id: {appointment_event.id}\n"
+            f"event: appointment\n"
+            f"data: {json.dumps(appointment_event.payload, separators=(',', ':'))}\n\n")
+
+class EventBroker:
+    """Fans appointment events out to the SSE streams of this process.
+
+    The ``appointment_events`` table is the channel between processes: every
+    worker runs one broker thread that picks up rows committed by any
+    worker and hands them to its local subscribers. On Postgres the thread
+    sleeps on LISTEN and wakes up on the NOTIFY sent with each commit; on
+    other databases it polls every ``EVENTS_POLL_INTERVAL`` seconds.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.poll_interval = app.config['EVENTS_POLL_INTERVAL']
+        self.retention = timedelta(hours=app.config['EVENTS_RETENTION_HOURS'])
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._dispatched = set()
+        self._pid = None
+
+    def subscribe(self, user_id: int) -> queue.Queue:
+        self._ensure_thread()
+        subscriber = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id: int, subscriber: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so start one in every worker process
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            with self.app.app_context():
+                self._last_id = db.session.query(db.func.max(AppointmentEvent.id)).scalar() or 0
+                db.session.remove()
+            threading.Thread(target=self._run, name='appointment-events', daemon=True).start()
+
+    def _run(self):
+        with self.app.app_context():
+            listener = self._listen() if db.engine.dialect.name == 'postgresql' else None
+        last_cleanup = datetime.min
+        while True:
+            try:
+                self._wait(listener)
+                self._dispatch_new()
+                if datetime.utcnow() - last_cleanup > timedelta(hours=1):
+                    self._cleanup()
+                    last_cleanup = datetime.utcnow()
+            except Exception as e:
+                print(f"Appointment event broker error: {str(e)}")
+                listener = None
+                threading.Event().wait(self.poll_interval)
+
+    def _listen(self):
+        try:
+            raw = db.engine.raw_connection()
+            raw.detach()
+            connection = raw.driver_connection
+            connection.autocommit = True
+            connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+            return connection
+        except Exception as e:
+            print(f"LISTEN failed, polling for appointment events instead: {str(e)}")
+            return None
+
+    def _wait(self, listener):
+        if listener is None:
+            threading.Event().wait(self.poll_interval)
+            return
+        # The timeout doubles as a safety poll in case a notification is missed
+        if select_module.select([listener], [], [], max(self.poll_interval, 5.0)) != ([], [], []):
+            listener.poll()
+            listener.notifies.clear()
+
+    def _dispatch_new(self):
+        with self._lock:
+            idle = not self._subscribers
+        with self.app.app_context():
+            if idle:
+                # Nobody to deliver to; new streams replay from the table themselves
+                self._last_id = db.session.query(db.func.max(AppointmentEvent.id)).scalar() or self._last_id
+                db.session.remove()
+                return
+            # Look back a little: concurrent transactions can commit ids out of order
+            rows = AppointmentEvent.query.filter(
+                AppointmentEvent.id > self._last_id - _LOOKBACK_IDS
+            ).order_by(AppointmentEvent.id).limit(1000).all()
+            db.session.remove()
+        for row in rows:
+            if row.id in self._dispatched:
+                continue
+            self._dispatched.add(row.id)
+            self._last_id = max(self._last_id, row.id)
+            message = (row.id, format_event(row))
+            with self._lock:
+                targets = [s for user_id in {row.patient_user_id, row.doctor_user_id}
+                           for s in self._subscribers.get(user_id, ())]
+            for subscriber in targets:
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    # End that stream; the client resumes from Last-Event-ID when it reconnects
+                    self._drain(subscriber)
+                    subscriber.put_nowait(None)
+        self._dispatched = {i for i in self._dispatched if i > self._last_id - _LOOKBACK_IDS}
+
+    @staticmethod
+    def _drain(subscriber: queue.Queue):
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _cleanup(self):
+        with self.app.app_context():
+            db.session.execute(delete(AppointmentEvent).where(
+                AppointmentEvent.created_at < datetime.utcnow() - self.retention
+            ))
+            db.session.commit()
+            db.session.remove()
+
+_event_broker_instance = None
+
+def get_event_broker():
+    global _event_broker_instance
+    if _event_broker_instance is None:
+        _event_broker_instance = EventBroker(current_app._get_current_object())
+    return _event_broker_instance
@@ -0,0 +1,50 @@
+from flask import request, make_response, Response
+from flask_login import current_user
+from functools import wraps
+import hashlib
+
+def conditional(version):
+    """Answer conditional GETs with 304 Not Modified before running the view.
+
+    ``version`` is called with the view arguments and returns
+    ``(last_modified, token)`` from one cheap query, or None to skip
+    conditional handling (for example when access will be denied). The ETag
+    hashes the token together with the user and the query string, so each
+    page or filter of a listing gets its own validator. When it matches
+    ``If-None-Match`` (or, without one, ``If-Modified-Since`` is not older
+    than ``last_modified``) the view and its serialization are skipped.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            current = version(*args, **kwargs)
+            if current is None:
+                return f(*args, **kwargs)
+            last_modified, token = current
+            # HTTP dates have one second resolution
+            last_modified = last_modified.replace(microsecond=0) if last_modified else None
+            args_key = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+            etag = hashlib.sha1(
+                f'{request.path}?{args_key}|{current_user.get_id()}|{token}'.encode()
+            ).hexdigest()
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(since and last_modified and last_modified <= since.replace(tzinfo=None))
+
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Browsers may keep the body but must revalidate before reusing it
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,110 @@
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+
+class PoolStats:
+    """Checkout counters of one connection pool (per process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection.
+
+    The wait includes opening a new connection when the pool has room and
+    the pre-ping, so a burst of reconnects after an idle period shows up
+    here as well as in ``connects`` and ``invalidations``.
+    """
+
+    def __init__(self, *args, **kw):
+        recreated = '_dispatch' in kw
+        super().__init__(*args, **kw)
+        self.stats = PoolStats()
+        if not recreated:
+            # A recreated pool copies these listeners and takes over the stats (see recreate)
+            stats = self.stats
+            event.listen(self, 'connect', lambda *a: stats.record_connect())
+            event.listen(self, 'invalidate', lambda *a: stats.record_invalidation())
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return connection
+
+def engine_options(config) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings of a config.
+
+    In-memory SQLite keeps Flask-SQLAlchemy's single static connection;
+    every other database gets a sized, recycled and pre-pinged
+    InstrumentedQueuePool. The statement timeout applies to PostgreSQL only.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if url.get_backend_name() == 'postgresql' and config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
+
+def pool_stats(engine) -> dict:
+    """Live state and checkout counters of an engine's pool, or {} if it is not instrumented"""
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {}
+    stats = pool.stats
+    with stats._lock:
+        return {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'checkouts': stats.checkouts,
+            'wait_seconds': stats.wait_seconds,
+            'max_wait_seconds': stats.max_wait_seconds,
+            'timeouts': stats.timeouts,
+            'connects': stats.connects,
+            'invalidations': stats.invalidations,
+        }
@@ -0,0 +1,189 @@
+from flask import current_app, g, has_app_context, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from contextlib import contextmanager
+from functools import wraps
+from sqlalchemy import event, text
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Read-replica routing. Request handlers marked with @read_only send their
+# queries to a healthy replica; everything else, any query after the session
+# has flushed a change, and every request within DB_READ_YOUR_WRITES_SECONDS
+# of the same user's last commit stays on the primary, so users always see
+# their own writes. Without DB_REPLICA_URLS everything goes to the primary.
+
+REPLICA_BIND_PREFIX = 'replica_'
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+# Seconds a replica may be behind; 0 when it has replayed everything it received
+_POSTGRES_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+def replica_binds(config) -> dict:
+    """SQLALCHEMY_BINDS entries for DB_REPLICA_URLS, with the primary's pool settings"""
+    from backend.app.utils.db_pool import engine_options
+    return {
+        f'{REPLICA_BIND_PREFIX}{i}': {'url': url, **engine_options({**config, 'SQLALCHEMY_DATABASE_URI': url})}
+        for i, url in enumerate(config['DB_REPLICA_URLS'])
+    }
+
+class ReplicaSet:
+    """Replica engines of an app, picked round-robin among the healthy ones.
+
+    A replica's health is checked again at most every ``health_interval``
+    seconds, from whichever request needs it: it must answer a query and,
+    on PostgreSQL, be no more than ``max_lag`` seconds behind the primary.
+    A replica whose connection drops mid-query is skipped until its next check.
+    """
+
+    def __init__(self, engines: list, health_interval: float, max_lag: float):
+        self.engines = engines
+        self.health_interval = health_interval
+        self.max_lag = max_lag
+        self._status = {}  # engine -> (healthy, checked_at)
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._on_error)
+
+    def choose(self):
+        """A healthy replica engine, or None if there is none"""
+        start = next(self._next)
+        for i in range(len(self.engines)):
+            engine = self.engines[(start + i) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+    def is_healthy(self, engine) -> bool:
+        with self._lock:
+            status = self._status.get(engine)
+        if status is not None and time.monotonic() - status[1] < self.health_interval:
+            return status[0]
+        healthy = self.check(engine)
+        with self._lock:
+            self._status[engine] = (healthy, time.monotonic())
+        return healthy
+
+    def check(self, engine) -> bool:
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    lag = connection.execute(_POSTGRES_LAG).scalar()
+                    if lag > self.max_lag:
+                        logger.warning("Replica %s is %.1fs behind, not using it", engine.url.render_as_string(), lag)
+                        return False
+                else:
+                    connection.execute(text('SELECT 1'))
+            return True
+        except Exception:
+            logger.exception("Replica %s is unavailable", engine.url.render_as_string())
+            return False
+
+    def mark_unhealthy(self, engine):
+        with self._lock:
+            self._status[engine] = (False, time.monotonic())
+
+    def _on_error(self, context):
+        if context.is_disconnect and context.engine is not None:
+            self.mark_unhealthy(context.engine)
+
+    def status(self) -> list:
+        """(url, healthy or None if never checked) of every replica"""
+        with self._lock:
+            return [(engine.url.render_as_string(), self._status.get(engine, (None,))[0]) for engine in self.engines]
+
+def get_replica_set():
+    """The ReplicaSet of the current app, or None when no replicas are configured"""
+    return current_app.extensions.get('db_replicas')
+
+def read_only(f):
+    """Let a request handler read from a replica.
+
+    Only for handlers that write nothing they read back: a flush inside the
+    handler moves the rest of its queries to the primary anyway.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+@contextmanager
+def primary_reads():
+    """Send the reads inside the block to the primary, even in a @read_only handler.
+
+    For results that outlive the request, such as cache entries, which must
+    not be built from a replica that is behind.
+    """
+    if not has_app_context():
+        yield
+        return
+    g.db_primary_reads = g.get('db_primary_reads', 0) + 1
+    try:
+        yield
+    finally:
+        g.db_primary_reads -= 1
+
+def _use_replica(session) -> bool:
+    return (has_app_context() and g.get('db_read_only', False) and not g.get('db_primary', False)
+            and not g.get('db_primary_reads', 0) and not session.info.get('wrote') and not session._flushing)
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends the reads of @read_only handlers to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None and engine is self._db.engine and _use_replica(self):
+            replicas = get_replica_set()
+            replica = replicas.choose() if replicas is not None else None
+            if replica is not None:
+                return replica
+        return engine
+
+def _after_flush(session, flush_context):
+    session.info['wrote'] = True
+
+def _after_commit(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        # Keep this user on the primary until the replicas have caught up
+        flask_session[PRIMARY_UNTIL_KEY] = time.time() + current_app.config['DB_READ_YOUR_WRITES_SECONDS']
+        g.db_primary = True
+
+def _after_rollback(session):
+    session.info.pop('wrote', None)
+
+def init_read_replicas(app, db):
+    """Route @read_only handlers to DB_REPLICA_URLS (bound by replica_binds).
+
+    Replica engines get the same query counting and SQLite pragmas as the
+    primary.
+    """
+    if not app.config['DB_REPLICA_URLS']:
+        return
+    from backend.app.utils.query_counter import install_query_counter
+    from backend.app.utils.sqlite_tuning import init_sqlite_pragmas
+    with app.app_context():
+        engines = [db.engines[f'{REPLICA_BIND_PREFIX}{i}'] for i in range(len(app.config['DB_REPLICA_URLS']))]
+    for engine in engines:
+        install_query_counter(engine)
+        init_sqlite_pragmas(app, engine)
+    app.extensions['db_replicas'] = ReplicaSet(
+        engines, app.config['DB_REPLICA_HEALTH_INTERVAL'], app.config['DB_REPLICA_MAX_LAG']
+    )
+
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_rollback', _after_rollback)
+
+    @app.before_request
+    def read_your_writes():
+        if flask_session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+            g.db_primary = True
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from backend.config.config import Config
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """Disk-backed cache of document analyses keyed by content hash.
+
+    Entries live in a small SQLite database shared by every worker process on
+    the host. Reads refresh an entry's access time, and writes evict the least
+    recently used entries once the stored payloads exceed
+    ``EXTRACTION_CACHE_MAX_BYTES``. Hit/miss/eviction counters are kept in the
+    same database so they add up across processes.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ExtractionCache, cls).__new__(cls)
+            cls._instance.path = Config.EXTRACTION_CACHE_PATH
+            cls._instance.max_bytes = Config.EXTRACTION_CACHE_MAX_BYTES
+            cls._instance.enabled = Config.EXTRACTION_CACHE_ENABLED
+            cls._instance._initialized = False
+        return cls._instance
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            conn.executemany(
+                "INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)",
+                [('hits',), ('misses',), ('evictions',)]
+            )
+            self._initialized = True
+        return conn
+
+    def make_key(self, content_hash: str, version: str) -> str:
+        return f"{content_hash}:{version}"
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'misses'")
+                    return None
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+                return json.loads(row[0])
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Extraction cache read error: {str(e)}")
+            return None
+
+    def put(self, key: str, value: dict):
+        """Store a value and evict least recently used entries over the size limit"""
+        if not self.enabled:
+            return
+        payload = json.dumps(value)
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time())
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    evicted = []
+                    for old_key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+                        if total <= self.max_bytes:
+                            break
+                        evicted.append((old_key,))
+                        total -= size
+                    conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+                    conn.execute(
+                        "UPDATE counters SET value = value + ? WHERE name = 'evictions'",
+                        (len(evicted),)
+                    )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Extraction cache write error: {str(e)}")
+
+    def prune(self, version: str):
+        """Delete the entries of other extractor versions, which are never read again"""
+        if not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM entries WHERE key NOT LIKE ?", (self.make_key('%', version),))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Extraction cache prune error: {str(e)}")
+
+    def stats(self) -> dict:
+        """Return counters and current size for metrics scraping"""
+        stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0, 'bytes': 0}
+        if not self.enabled:
+            return stats
+        try:
+            conn = self._connect()
+            try:
+                stats.update(dict(conn.execute("SELECT name, value FROM counters")))
+                stats['entries'], stats['bytes'] = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Extraction cache stats error: {str(e)}")
+        return stats
+
+_extraction_cache_instance = None
+
+def get_extraction_cache():
+    global _extraction_cache_instance
+    if _extraction_cache_instance is None:
+        _extraction_cache_instance = ExtractionCache()
+    return _extraction_cache_instance
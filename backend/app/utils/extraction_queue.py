@@ -0,0 +1,169 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import current_app
+import logging
+import threading
+import os
+from backend.app import db
+from backend.app.models import FileAttachment
+from backend.app.utils.health_metrics import replace_attachment_metrics
+
+logger = logging.getLogger(__name__)
+
+def _init_worker():
+    """Runs once in every pool worker process"""
+    from backend.app.utils.file_processor import disable_parallel_pages
+    disable_parallel_pages()
+
+def _run_extraction(file_path: str, content_hash: str = None) -> dict:
+    """Entry point executed inside a pool worker process"""
+    from backend.app.utils.file_processor import get_file_processor
+    return get_file_processor().extract(file_path, content_hash)
+
+class ExtractionQueue:
+    """Runs document extraction for uploaded attachments in a process pool.
+
+    The ``file_attachments`` table is the durable queue: an attachment is
+    written as ``pending`` by the upload request, claimed atomically before it
+    is submitted to the pool, and moved to ``completed`` or ``failed`` when
+    the worker finishes. Jobs that fail are put back to ``pending`` and
+    retried with exponential backoff until ``EXTRACTION_MAX_RETRIES`` is hit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.max_workers = app.config['EXTRACTION_WORKERS']
+        self.max_retries = app.config['EXTRACTION_MAX_RETRIES']
+        self.retry_delay = app.config['EXTRACTION_RETRY_DELAY']
+        self.job_timeout = app.config['EXTRACTION_JOB_TIMEOUT']
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Gunicorn forks workers after import, so every process needs its own pool
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def enqueue(self, attachment_id: int) -> bool:
+        """Claim a pending attachment and submit it to the pool"""
+        with self.app.app_context():
+            claimed = FileAttachment.query.filter_by(
+                id=attachment_id,
+                extraction_status='pending'
+            ).update({
+                'extraction_status': 'processing',
+                'extraction_attempts': FileAttachment.extraction_attempts + 1,
+                'extraction_started_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                return False
+            attachment = db.session.get(FileAttachment, attachment_id)
+            file_path, content_hash = attachment.file_path, attachment.content_hash
+
+        try:
+            future = self._get_executor().submit(_run_extraction, file_path, content_hash)
+        except BrokenProcessPool:
+            self._reset_executor()
+            future = self._get_executor().submit(_run_extraction, file_path, content_hash)
+
+        with self._lock:
+            self._outstanding += 1
+        future.add_done_callback(lambda f: self._on_done(attachment_id, f))
+        return True
+
+    def _on_done(self, attachment_id: int, future):
+        try:
+            self._record_result(attachment_id, future)
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+                self._idle.notify_all()
+
+    def _record_result(self, attachment_id: int, future):
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._reset_executor()
+
+        with self.app.app_context():
+            attachment = db.session.get(FileAttachment, attachment_id)
+            if attachment is None:
+                return
+
+            if error is None:
+                document = future.result()
+                attachment.extracted_data = document['analysis']
+                attachment.extracted_text = document['text']
+                attachment.extraction_status = 'completed'
+                attachment.extraction_error = None
+                attachment.extracted_at = datetime.utcnow()
+                # Readings land in health_metrics in the same commit as the blob
+                replace_attachment_metrics(db.session, attachment)
+                db.session.commit()
+                return
+
+            # Not inside an except block: pass the future's exception for its traceback
+            logger.error("Extraction failed for attachment %s", attachment_id, exc_info=error)
+            attachment.extraction_error = str(error)
+            retry = attachment.extraction_attempts <= self.max_retries
+            attachment.extraction_status = 'pending' if retry else 'failed'
+            attempts = attachment.extraction_attempts
+            db.session.commit()
+
+        if retry:
+            delay = self.retry_delay * 2 ** (attempts - 1)
+            with self._lock:
+                self._outstanding += 1
+            timer = threading.Timer(delay, self._retry, args=(attachment_id,))
+            timer.daemon = True
+            timer.start()
+
+    def _retry(self, attachment_id: int):
+        try:
+            self.enqueue(attachment_id)
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+                self._idle.notify_all()
+
+    def requeue_pending(self) -> int:
+        """Re-submit pending jobs and jobs stalled by a crashed worker"""
+        stalled_before = datetime.utcnow() - timedelta(seconds=self.job_timeout)
+        with self.app.app_context():
+            FileAttachment.query.filter(
+                FileAttachment.extraction_status == 'processing',
+                FileAttachment.extraction_started_at < stalled_before
+            ).update({'extraction_status': 'pending'}, synchronize_session=False)
+            db.session.commit()
+
+            pending_ids = [a.id for a in FileAttachment.query.filter_by(
+                extraction_status='pending'
+            ).with_entities(FileAttachment.id)]
+
+        return sum(1 for attachment_id in pending_ids if self.enqueue(attachment_id))
+
+    def wait(self):
+        """Block until every job submitted by this process, retries included, has finished"""
+        with self._idle:
+            self._idle.wait_for(lambda: self._outstanding == 0)
+
+_extraction_queue_instance = None
+
+def get_extraction_queue():
+    global _extraction_queue_instance
+    if _extraction_queue_instance is None:
+        _extraction_queue_instance = ExtractionQueue(current_app._get_current_object())
+    return _extraction_queue_instance
@@ -1,12 +1,61 @@
-import pytesseract
-from PIL import Image
-import pdfplumber
-import cv2
-import numpy as np
 import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+import hashlib
 import json
 import re
+import tempfile
+import threading
+from backend.config.config import Config
+from backend.utils.encryption_utils import get_encryption_utils
+from backend.app.utils.extraction_cache import get_extraction_cache, hash_file
+from backend.app.utils.metric_extractor import get_metric_extractor
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction output changes so cached analyses are not reused
+EXTRACTOR_VERSION = "6"
+
+# pdfplumber and the OCR stack (OpenCV, Tesseract, Pillow, NumPy) are imported
+# where they are first used: this module is loaded only in extraction worker
+# processes, and even there a PDF never pays for the image libraries.
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> list:
+    """Extract the text of pages [start, stop) in a worker process"""
+    import pdfplumber
+    with pdfplumber.open(file_path, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+# Page ranges of large PDFs go to one pool per process, created on first use
+# and kept for later documents. Extraction workers read their pages themselves
+# (see disable_parallel_pages): their pool already runs a document per core,
+# and a page pool in each of them would multiply the processes.
+_page_pool = None
+_page_pool_pid = None
+_page_pool_lock = threading.Lock()
+_parallel_pages = True
+
+def disable_parallel_pages():
+    """Extract every PDF in the calling process from now on"""
+    global _parallel_pages
+    _parallel_pages = False
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool, _page_pool_pid
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_pid != os.getpid():
+            _page_pool = ProcessPoolExecutor(max_workers=Config.PDF_EXTRACTION_WORKERS)
+            _page_pool_pid = os.getpid()
+        return _page_pool
+
+def _reset_page_pool():
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False, cancel_futures=True)
+        _page_pool = None
 
 class FileProcessor:
     _instance = None
@@ -14,179 +63,174 @@ class FileProcessor:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(FileProcessor, cls).__new__(cls)
+            get_extraction_cache().prune(EXTRACTOR_VERSION)
         return cls._instance
 
-    def process_pdf(self, file_path: str) -> dict:
+    def process_pdf(self, file_path: str, content_hash: str = None) -> dict:
         """Extract text from PDF and analyze content"""
         try:
-            text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-            
-            return self._analyze_content(text)
+            return self._cached_document(file_path, content_hash, self._analyze_pdf, False)['analysis']
         except Exception as e:
             print(f"PDF processing error: {str(e)}")
             return self._get_empty_analysis()
 
-    def process_image(self, file_path: str) -> dict:
+    def process_image(self, file_path: str, content_hash: str = None) -> dict:
         """Process medical images"""
         try:
-            # Load image
-            image = cv2.imread(file_path)
-            if image is None:
-                raise ValueError("Could not load image")
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply thresholding
-            _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
-            
-            # Extract text using OCR
-            text = pytesseract.image_to_string(thresh)
-            
-            return self._analyze_content(text)
+            return self._cached_document(file_path, content_hash, self._analyze_image, False)['analysis']
         except Exception as e:
             print(f"Image processing error: {str(e)}")
             return self._get_empty_analysis()
 
+    def extract(self, file_path: str, content_hash: str = None, with_text: bool = None) -> dict:
+        """Analyze a PDF or image, raising on failure so callers can retry.
+
+        Returns ``{'analysis': metrics, 'text': document text}``. The text is
+        only read when ``with_text`` (default ``SEARCH_INDEX_DOCUMENT_TEXT``)
+        is set and is None otherwise. Encrypted uploads (``.enc``) are only
+        decrypted, to a temporary file, when there is something to compute.
+        """
+        if with_text is None:
+            with_text = Config.SEARCH_INDEX_DOCUMENT_TEXT
+        encrypted = file_path.endswith('.enc')
+        plain_name = file_path[:-len('.enc')] if encrypted else file_path
+        analyze = self._analyze_pdf if plain_name.lower().endswith('.pdf') else self._analyze_image
+        if not encrypted:
+            return self._cached_document(file_path, content_hash, analyze, with_text)
+
+        def analyze_decrypted(path, with_text):
+            with tempfile.NamedTemporaryFile(suffix=os.path.splitext(plain_name)[1], delete=False) as plaintext:
+                for chunk in get_encryption_utils().iter_decrypt(path):
+                    plaintext.write(chunk)
+            try:
+                return analyze(plaintext.name, with_text)
+            finally:
+                os.remove(plaintext.name)
+
+        if content_hash is None and not with_text:
+            cache = get_extraction_cache()
+            if cache.enabled:
+                # The ciphertext differs per upload, so hash the plaintext instead
+                digest = hashlib.sha256()
+                for chunk in get_encryption_utils().iter_decrypt(file_path):
+                    digest.update(chunk)
+                content_hash = digest.hexdigest()
+        return self._cached_document(file_path, content_hash, analyze_decrypted, with_text)
+
+    def _cached_document(self, file_path: str, content_hash: str, analyze, with_text: bool) -> dict:
+        """Return the analysis of the file contents, and its text if asked for.
+
+        Only the analysis is cached, never the document text, so a document
+        whose text is wanted is always read again.
+        """
+        cache = get_extraction_cache()
+        if not cache.enabled:
+            return analyze(file_path, with_text)
+
+        key = cache.make_key(content_hash or hash_file(file_path), EXTRACTOR_VERSION)
+        if not with_text:
+            analysis = cache.get(key)
+            if analysis is not None:
+                return self._document(analysis, None)
+        document = analyze(file_path, with_text)
+        cache.put(key, document['analysis'])
+        return document
+
+    def _analyze_pdf(self, file_path: str, with_text: bool = False) -> dict:
+        if not with_text:
+            return self._document(self._analyze_pages(self.iter_pdf_pages(file_path)), None)
+
+        # Every page is read, not just those up to the last metric, so the text can be searched
+        texts = []
+
+        def pages():
+            for text in self.iter_pdf_pages(file_path):
+                texts.append(text)
+                yield text
+        analysis = self._analyze_pages(pages(), stop_when_complete=False)
+        return self._document(analysis, "\n".join(texts))
+
+    def _analyze_image(self, file_path: str, with_text: bool = False) -> dict:
+        text = self._extract_image_text(file_path)
+        return self._document(self._analyze_content(text), text if with_text else None)
+
+    def _document(self, analysis: dict, text: str) -> dict:
+        if text is not None:
+            text = text[:Config.EXTRACTED_TEXT_MAX_CHARS]
+        return {"analysis": analysis, "text": text}
+
+    def iter_pdf_pages(self, file_path: str, max_pages: int = None, parallel: bool = None):
+        """Yield the text of each PDF page in order.
+
+        Documents with at least ``PDF_PARALLEL_MIN_PAGES`` pages are split into
+        page ranges that are extracted by the process's page pool, unless
+        parallel pages are disabled. Closing the generator early cancels any
+        ranges that have not started yet.
+        """
+        import pdfplumber
+        max_pages = Config.PDF_MAX_PAGES if max_pages is None else max_pages
+        with pdfplumber.open(file_path) as pdf:
+            page_count = len(pdf.pages)
+            if max_pages:
+                page_count = min(page_count, max_pages)
+            if parallel is None:
+                parallel = (_parallel_pages and Config.PDF_EXTRACTION_WORKERS > 1
+                            and page_count >= Config.PDF_PARALLEL_MIN_PAGES)
+            if not parallel:
+                for page in pdf.pages[:page_count]:
+                    yield page.extract_text() or ""
+                return
+
+        chunk = Config.PDF_PAGES_PER_CHUNK
+        futures = []
+        try:
+            executor = _get_page_pool()
+            for start in range(0, page_count, chunk):
+                futures.append(executor.submit(_extract_page_range, file_path, start, min(start + chunk, page_count)))
+            for future in futures:
+                yield from future.result()
+        except BrokenProcessPool:
+            # A page worker died; the next document gets a fresh pool
+            _reset_page_pool()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _extract_image_text(self, file_path: str) -> str:
+        """OCR the text of an image through the preprocessing pipeline"""
+        from backend.app.utils.image_pipeline import get_image_pipeline
+        text, timings = get_image_pipeline().run(file_path)
+        logger.info("Image pipeline timings for %s: %s", os.path.basename(file_path), timings)
+        return text
+
     def _analyze_content(self, text: str) -> dict:
         """Analyze content for health metrics"""
         try:
-            return {
-                "blood_pressure": self._extract_blood_pressure(text),
-                "cholesterol": self._extract_cholesterol(text),
-                "glucose": self._extract_glucose(text),
-                "heart_rate": self._extract_heart_rate(text)
-            }
+            return self._analyze_pages([text])
         except Exception as e:
             print(f"Content analysis error: {str(e)}")
             return self._get_empty_analysis()
 
-    def _get_empty_analysis(self) -> dict:
-        """Return empty analysis structure"""
-        return {
-            "blood_pressure": {"value": "N/A", "status": "Unknown"},
-            "cholesterol": {"value": "N/A", "status": "Unknown"},
-            "glucose": {"value": "N/A", "status": "Unknown"},
-            "heart_rate": {"value": "N/A", "status": "Unknown"}
-        }
-
-    def _extract_blood_pressure(self, text: str) -> dict:
-        """Extract blood pressure readings"""
-        try:
-            # Simple pattern matching for blood pressure
-            bp_pattern = r"\d+/\d+"
-            matches = re.findall(bp_pattern, text)
-            
-            if matches:
-                return {
-                    "value": matches[0],
-                    "status": self._check_bp_status(matches[0])
-                }
-        except Exception as e:
-            print(f"Blood pressure extraction error: {str(e)}")
-        return {"value": "N/A", "status": "Unknown"}
-
-    def _extract_cholesterol(self, text: str) -> dict:
-        """Extract cholesterol readings"""
-        try:
-            # Simple pattern matching for cholesterol
-            cholesterol_pattern = r"\d+(\.\d+)?\s*mg/dL"
-            matches = re.findall(cholesterol_pattern, text)
-            
-            if matches:
-                value = matches[0][0] if matches[0][0] else matches[0]
-                return {
-                    "value": value,
-                    "status": self._check_cholesterol_status(value)
-                }
-        except Exception as e:
-            print(f"Cholesterol extraction error: {str(e)}")
-        return {"value": "N/A", "status": "Unknown"}
-
-    def _extract_glucose(self, text: str) -> dict:
-        """Extract glucose readings"""
+    def _analyze_pages(self, pages, stop_when_complete: bool = True) -> dict:
+        """Analyze page texts incrementally, keeping the first reading of each metric"""
+        extractor = get_metric_extractor()
+        found = {}
         try:
-            # Simple pattern matching for glucose
-            glucose_pattern = r"\d+(\.\d+)?\s*mg/dL"
-            matches = re.findall(glucose_pattern, text)
-            
-            if matches:
-                value = matches[0][0] if matches[0][0] else matches[0]
-                return {
-                    "value": value,
-                    "status": self._check_glucose_status(value)
-                }
-        except Exception as e:
-            print(f"Glucose extraction error: {str(e)}")
-        return {"value": "N/A", "status": "Unknown"}
+            for text in pages:
+                complete = extractor.scan(text, found)
+                if stop_when_complete and complete:
+                    break
+        finally:
+            if hasattr(pages, "close"):
+                pages.close()
+        analysis = extractor.empty_analysis()
+        analysis.update(found)
+        return analysis
 
-    def _extract_heart_rate(self, text: str) -> dict:
-        """Extract heart rate readings"""
-        try:
-            # Simple pattern matching for heart rate
-            hr_pattern = r"\d+\s*bpm"
-            matches = re.findall(hr_pattern, text)
-            
-            if matches:
-                value = matches[0].split()[0]
-                return {
-                    "value": value,
-                    "status": self._check_hr_status(value)
-                }
-        except Exception as e:
-            print(f"Heart rate extraction error: {str(e)}")
-        return {"value": "N/A", "status": "Unknown"}
-
-    def _check_bp_status(self, bp_reading: str) -> str:
-        """Check blood pressure status"""
-        try:
-            systolic, diastolic = map(int, bp_reading.split("/"))
-            if systolic > 130 or diastolic > 80:
-                return "High"
-            if systolic < 90 or diastolic < 60:
-                return "Low"
-            return "Normal"
-        except:
-            return "Unknown"
-
-    def _check_cholesterol_status(self, cholesterol: str) -> str:
-        """Check cholesterol status"""
-        try:
-            value = float(cholesterol)
-            if value > 200:
-                return "High"
-            if value < 150:
-                return "Low"
-            return "Normal"
-        except:
-            return "Unknown"
-
-    def _check_glucose_status(self, glucose: str) -> str:
-        """Check glucose status"""
-        try:
-            value = float(glucose)
-            if value > 126:
-                return "High"
-            if value < 70:
-                return "Low"
-            return "Normal"
-        except:
-            return "Unknown"
-
-    def _check_hr_status(self, hr: str) -> str:
-        """Check heart rate status"""
-        try:
-            value = int(hr)
-            if value > 100:
-                return "High"
-            if value < 60:
-                return "Low"
-            return "Normal"
-        except:
-            return "Unknown"
+    def _get_empty_analysis(self) -> dict:
+        """Return empty analysis structure"""
+        return get_metric_extractor().empty_analysis()
 
 _file_processor_instance = None
 
@@ -0,0 +1,83 @@
+from datetime import datetime
+from sqlalchemy import select, delete, exists
+from backend.app.models import FileAttachment, HealthRecord, HealthMetric
+from backend.app.utils.metric_extractor import get_metric_extractor
+
+def metric_rows(analysis: dict, patient_id: int, attachment_id: int, observed_at: datetime) -> list:
+    """health_metrics rows for the numeric readings of one extraction result"""
+    rules = get_metric_extractor().rules
+    rows = []
+    for name, reading in (analysis or {}).items():
+        rule = rules.get(name)
+        if rule is None or not isinstance(reading, dict):
+            continue
+        try:
+            components = rule.parse(str(reading.get('value')))
+        except (TypeError, ValueError):
+            continue  # "N/A" and other placeholders
+        if not components:
+            continue
+        rows.append({
+            'patient_id': patient_id,
+            'attachment_id': attachment_id,
+            'metric': name,
+            'value': components[0],
+            'secondary_value': components[1] if len(components) > 1 else None,
+            'unit': rule.unit,
+            'status': reading.get('status'),
+            'observed_at': observed_at
+        })
+    return rows
+
+def replace_attachment_metrics(session, attachment: FileAttachment) -> int:
+    """Store the readings of an attachment in the caller's transaction.
+
+    Readings are dated by the upload, as documents carry no reliable
+    measurement date of their own.
+    """
+    connection = session.connection()
+    patient_id = connection.execute(
+        select(HealthRecord.patient_id).where(HealthRecord.id == attachment.health_record_id)
+    ).scalar()
+    connection.execute(delete(HealthMetric).where(HealthMetric.attachment_id == attachment.id))
+    if patient_id is None:
+        return 0
+    rows = metric_rows(attachment.extracted_data, patient_id, attachment.id,
+                       attachment.uploaded_at or datetime.utcnow())
+    if rows:
+        connection.execute(HealthMetric.__table__.insert(), rows)
+    return len(rows)
+
+def backfill_metrics(session, batch_size: int = 500, rebuild: bool = False) -> tuple:
+    """Fill health_metrics from completed attachments, committing per batch.
+
+    Only attachments without stored readings are read unless ``rebuild`` is
+    set, in which case every attachment's readings are replaced. Returns
+    (attachments scanned, readings written).
+    """
+    statement = select(
+        FileAttachment.id, FileAttachment.extracted_data, FileAttachment.uploaded_at, HealthRecord.patient_id
+    ).join(HealthRecord, HealthRecord.id == FileAttachment.health_record_id).where(
+        FileAttachment.extraction_status == 'completed'
+    )
+    if not rebuild:
+        statement = statement.where(~exists().where(HealthMetric.attachment_id == FileAttachment.id))
+
+    scanned = written = 0
+    last_id = 0
+    while True:
+        batch = session.execute(
+            statement.where(FileAttachment.id > last_id).order_by(FileAttachment.id).limit(batch_size)
+        ).all()
+        if not batch:
+            return scanned, written
+        last_id = batch[-1].id
+        rows = [row for a in batch
+                for row in metric_rows(a.extracted_data, a.patient_id, a.id, a.uploaded_at or datetime.utcnow())]
+        if rebuild:
+            session.execute(delete(HealthMetric).where(HealthMetric.attachment_id.in_([a.id for a in batch])))
+        if rows:
+            session.execute(HealthMetric.__table__.insert(), rows)
+        session.commit()
+        scanned += len(batch)
+        written += len(rows)
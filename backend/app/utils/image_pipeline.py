@@ -0,0 +1,133 @@
+import pytesseract
+from PIL import Image
+import cv2
+import numpy as np
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend.config.config import Config
+
+class ImagePipeline:
+    """Prepares photographed or scanned documents for OCR.
+
+    Stages run in order: load as grayscale, downscale, threshold, deskew,
+    crop text regions, then OCR each region. Tesseract runs as a separate
+    process per call, so regions are recognized concurrently from a thread
+    pool. ``run`` returns the recognized text together with the time spent
+    in each stage, in milliseconds.
+    """
+
+    def __init__(self, max_dimension: int = None, target_dpi: int = None, threshold: str = None,
+                 deskew: bool = None, crop_regions: bool = None, min_region_area: int = None,
+                 max_regions: int = None, ocr_workers: int = None):
+        self.max_dimension = max_dimension or Config.IMAGE_MAX_DIMENSION
+        self.target_dpi = target_dpi or Config.IMAGE_TARGET_DPI
+        self.threshold = threshold or Config.IMAGE_THRESHOLD
+        self.deskew = Config.IMAGE_DESKEW if deskew is None else deskew
+        self.crop_regions = Config.IMAGE_CROP_REGIONS if crop_regions is None else crop_regions
+        self.min_region_area = min_region_area or Config.IMAGE_MIN_REGION_AREA
+        self.max_regions = max_regions or Config.IMAGE_OCR_MAX_REGIONS
+        self.ocr_workers = ocr_workers or Config.IMAGE_OCR_WORKERS
+
+    def run(self, file_path: str):
+        """Return (text, timings) for an image file"""
+        timings = {}
+
+        def stage(name, func, *args):
+            start = time.perf_counter()
+            result = func(*args)
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            return result
+
+        gray = stage("load", self._load, file_path)
+        gray = stage("downscale", self._downscale, gray, self._source_dpi(file_path))
+        binary = stage("threshold", self._threshold, gray)
+        if self.deskew:
+            binary = stage("deskew", self._deskew, binary)
+        regions = stage("regions", self._find_regions, binary) if self.crop_regions else [binary]
+        text = stage("ocr", self._ocr_regions, regions)
+        timings["regions_found"] = len(regions)
+        return text, timings
+
+    def _load(self, file_path: str):
+        image = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError("Could not load image")
+        return image
+
+    def _source_dpi(self, file_path: str):
+        """Read the DPI recorded in the image header, if any"""
+        try:
+            with Image.open(file_path) as image:
+                dpi = image.info.get("dpi")
+            return float(dpi[0]) if dpi and dpi[0] else None
+        except Exception:
+            return None
+
+    def _downscale(self, gray, source_dpi):
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.max_dimension / max(height, width))
+        if source_dpi and source_dpi > self.target_dpi:
+            scale = min(scale, self.target_dpi / source_dpi)
+        if scale >= 1.0:
+            return gray
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def _threshold(self, gray):
+        if self.threshold == "adaptive":
+            return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY, 31, 15)
+        if self.threshold == "global":
+            _, binary = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)
+            return binary
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return binary
+
+    def _deskew(self, binary):
+        ys, xs = np.nonzero(binary == 0)
+        if len(xs) < 50:
+            return binary
+        angle = cv2.minAreaRect(np.column_stack((xs, ys)).astype(np.float32))[-1]
+        if angle > 45:
+            angle -= 90
+        if abs(angle) < 0.5:
+            return binary
+        height, width = binary.shape[:2]
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        return cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_NEAREST,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+    def _find_regions(self, binary):
+        """Crop blocks of text, ordered top to bottom and left to right"""
+        height, width = binary.shape[:2]
+        # Smear ink horizontally and vertically so characters merge into blocks
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(15, width // 40), max(5, height // 80)))
+        blocks = cv2.dilate(cv2.bitwise_not(binary), kernel, iterations=2)
+        contours, _ = cv2.findContours(blocks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        boxes = [cv2.boundingRect(c) for c in contours]
+        boxes = [b for b in boxes if b[2] * b[3] >= self.min_region_area]
+        if not boxes or len(boxes) > self.max_regions:
+            # Too fragmented to be worth separate Tesseract runs
+            return [binary]
+
+        boxes.sort(key=lambda b: (b[1], b[0]))
+        pad = 4
+        return [
+            binary[max(0, y - pad):min(height, y + h + pad), max(0, x - pad):min(width, x + w + pad)]
+            for x, y, w, h in boxes
+        ]
+
+    def _ocr_regions(self, regions) -> str:
+        if len(regions) == 1 or self.ocr_workers <= 1:
+            return "\n".join(pytesseract.image_to_string(region) for region in regions)
+        with ThreadPoolExecutor(max_workers=min(self.ocr_workers, len(regions))) as executor:
+            return "\n".join(executor.map(pytesseract.image_to_string, regions))
+
+_image_pipeline_instance = None
+
+def get_image_pipeline():
+    global _image_pipeline_instance
+    if _image_pipeline_instance is None:
+        _image_pipeline_instance = ImagePipeline()
+    return _image_pipeline_instance
@@ -0,0 +1,219 @@
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from datetime import datetime
+import heapq
+import itertools
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+from backend.config.config import Config
+
+class OutboundMessage:
+    def __init__(self, recipient: str, subject: str, body: str):
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.attempts = 0
+        self.last_error = None
+
+class DeadLetterStore:
+    """SQLite store for messages that exhausted their retries"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    error TEXT,
+                    failed_at TEXT NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def add(self, message: OutboundMessage):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO dead_letters (recipient, subject, body, attempts, error, failed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (message.recipient, message.subject, message.body, message.attempts,
+                 message.last_error, datetime.utcnow().isoformat())
+            )
+
+    def pop_all(self) -> list:
+        """Remove and return every dead letter as an OutboundMessage"""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT id, recipient, subject, body FROM dead_letters ORDER BY id").fetchall()
+            conn.executemany("DELETE FROM dead_letters WHERE id = ?", [(row[0],) for row in rows])
+        return [OutboundMessage(recipient, subject, body) for _, recipient, subject, body in rows]
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+
+class MailQueue:
+    """Bounded outbound mail queue served by a small pool of SMTP sessions.
+
+    Each worker thread keeps one SMTP connection open and sends every message
+    it can take from the queue over it, reconnecting after
+    ``MAIL_MAX_MESSAGES_PER_CONNECTION`` messages or once the queue has been
+    idle for ``MAIL_IDLE_TIMEOUT`` seconds. ``send`` blocks for at most
+    ``MAIL_ENQUEUE_TIMEOUT`` seconds when the queue is full and then reports
+    failure, which is the backpressure signal to callers. Failed messages are
+    retried with exponential backoff and moved to the dead-letter store when
+    ``MAIL_MAX_RETRIES`` is exhausted.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MailQueue, cls).__new__(cls)
+            cls._instance._configure()
+        return cls._instance
+
+    def _configure(self):
+        self.smtp_server = Config.MAIL_SERVER
+        self.smtp_port = Config.MAIL_PORT
+        self.use_tls = Config.MAIL_USE_TLS
+        self.sender_email = Config.MAIL_USERNAME
+        self.sender_password = Config.MAIL_PASSWORD
+        self.pool_size = Config.MAIL_POOL_SIZE
+        self.max_retries = Config.MAIL_MAX_RETRIES
+        self.retry_backoff = Config.MAIL_RETRY_BACKOFF
+        self.idle_timeout = Config.MAIL_IDLE_TIMEOUT
+        self.enqueue_timeout = Config.MAIL_ENQUEUE_TIMEOUT
+        self.max_per_connection = Config.MAIL_MAX_MESSAGES_PER_CONNECTION
+        self.dead_letters = DeadLetterStore(Config.MAIL_DEAD_LETTER_PATH)
+        self._queue = queue.Queue(maxsize=Config.MAIL_QUEUE_SIZE)
+        self._retries = []
+        self._retry_order = itertools.count()
+        self._lock = threading.Lock()
+        self._workers_pid = None
+        self.sent = 0
+        self.connections_opened = 0
+
+    def send(self, recipient: str, subject: str, body: str) -> bool:
+        """Queue a message, returning False if the queue stays full"""
+        self._ensure_workers()
+        try:
+            self._queue.put(OutboundMessage(recipient, subject, body), timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            print(f"Mail queue full, message to {recipient} not queued")
+            return False
+
+    def flush(self):
+        """Block until every queued message was sent or dead-lettered"""
+        self._queue.join()
+
+    def requeue_dead_letters(self) -> int:
+        messages = self.dead_letters.pop_all()
+        for message in messages:
+            self.send(message.recipient, message.subject, message.body)
+        return len(messages)
+
+    def _ensure_workers(self):
+        # Threads do not survive a fork, so start them in every worker process
+        with self._lock:
+            if self._workers_pid == os.getpid():
+                return
+            self._workers_pid = os.getpid()
+            for i in range(self.pool_size):
+                threading.Thread(target=self._work, name=f'mail-sender-{i}', daemon=True).start()
+
+    def _next_message(self):
+        with self._lock:
+            if self._retries and self._retries[0][0] <= time.monotonic():
+                return heapq.heappop(self._retries)[2]
+        try:
+            return self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    def _work(self):
+        server = None
+        sent_on_connection = 0
+        last_used = time.monotonic()
+        while True:
+            message = self._next_message()
+            if message is None:
+                if server is not None and time.monotonic() - last_used > self.idle_timeout:
+                    self._close(server)
+                    server = None
+                continue
+
+            if server is not None and sent_on_connection >= self.max_per_connection:
+                self._close(server)
+                server = None
+            try:
+                if server is None:
+                    server = self._connect()
+                    sent_on_connection = 0
+                server.send_message(self._build(message))
+                sent_on_connection += 1
+                last_used = time.monotonic()
+                with self._lock:
+                    self.sent += 1
+                self._queue.task_done()
+            except Exception as e:
+                print(f"Email error: {str(e)}")
+                if server is not None:
+                    self._close(server)
+                    server = None
+                try:
+                    self._fail(message, e)
+                except Exception as fail_error:
+                    # The sender thread must survive, even if the message is lost
+                    print(f"Email to {message.recipient} dropped, dead letter not stored: {str(fail_error)}")
+                    self._queue.task_done()
+
+    def _fail(self, message: OutboundMessage, error: Exception):
+        message.attempts += 1
+        message.last_error = str(error)
+        if message.attempts > self.max_retries:
+            self.dead_letters.add(message)
+            self._queue.task_done()
+            return
+        due = time.monotonic() + self.retry_backoff * 2 ** (message.attempts - 1)
+        with self._lock:
+            heapq.heappush(self._retries, (due, next(self._retry_order), message))
+
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=10)
+        if self.use_tls:
+            server.starttls()
+        server.login(self.sender_email, self.sender_password)
+        with self._lock:
+            self.connections_opened += 1
+        return server
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _build(self, message: OutboundMessage):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender_email
+        msg['To'] = message.recipient
+        msg['Subject'] = message.subject
+        msg.attach(MIMEText(message.body, 'plain'))
+        return msg
+
+_mail_queue_instance = None
+
+def get_mail_queue():
+    global _mail_queue_instance
+    if _mail_queue_instance is None:
+        _mail_queue_instance = MailQueue()
+    return _mail_queue_instance
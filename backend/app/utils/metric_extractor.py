@@ -0,0 +1,148 @@
+import json
+import re
+from backend.config.config import Config
+
+# Each rule describes one health metric. ``pattern`` captures the numeric
+# components of a reading and ``thresholds`` holds one {"low", "high"} pair
+# per component. A reading is High when any component is above its high
+# bound and Low when any component is below its low bound. Metrics read in
+# the same unit are anchored to their label, or they would take each other's
+# values.
+DEFAULT_METRIC_RULES = [
+    {
+        "name": "blood_pressure",
+        "pattern": r"(\d+)/(\d+)",
+        "unit": "mmHg",
+        "thresholds": [{"low": 90, "high": 130}, {"low": 60, "high": 80}]
+    },
+    {
+        "name": "cholesterol",
+        "pattern": r"(?i:cholesterol)[^\d]{0,20}(\d+(?:\.\d+)?)\s*mg/dL",
+        "unit": "mg/dL",
+        "thresholds": [{"low": 150, "high": 200}]
+    },
+    {
+        "name": "glucose",
+        "pattern": r"(?i:glucose)[^\d]{0,20}(\d+(?:\.\d+)?)\s*mg/dL",
+        "unit": "mg/dL",
+        "thresholds": [{"low": 70, "high": 126}]
+    },
+    {
+        "name": "heart_rate",
+        "pattern": r"(\d+)\s*bpm",
+        "unit": "bpm",
+        "thresholds": [{"low": 60, "high": 100}]
+    }
+]
+
+class MetricRule:
+    def __init__(self, name: str, pattern: str, unit: str, thresholds: list, separator: str = "/"):
+        self.name = name
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.unit = unit
+        self.thresholds = thresholds
+        self.separator = separator
+
+    def reading(self, match) -> dict:
+        """Build a reading from a match of this rule's pattern"""
+        components = [group for group in match.groups() if group is not None] or [match.group(0)]
+        value = self.separator.join(components)
+        return {"value": value, "status": self.status(value)}
+
+    def parse(self, value: str) -> list:
+        """Split a stored reading back into its numeric components"""
+        return [float(part) for part in value.split(self.separator)]
+
+    def status(self, value: str) -> str:
+        """Check a reading against the rule's thresholds"""
+        try:
+            components = self.parse(value)
+            if len(components) != len(self.thresholds):
+                return "Unknown"
+            bounds = list(zip(components, self.thresholds))
+            if any(v > t["high"] for v, t in bounds):
+                return "High"
+            if any(v < t["low"] for v, t in bounds):
+                return "Low"
+            return "Normal"
+        except (TypeError, ValueError):
+            return "Unknown"
+
+class MetricExtractor:
+    """Extracts every configured metric from text in a single scan.
+
+    Rules that share a pattern are grouped so each distinct pattern is
+    matched once. All
+    patterns are joined into one compiled alternation; the scanner jumps to
+    the next position where any pattern matches, tries the still-missing
+    patterns there, and stops as soon as every metric has a reading.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = {}
+        self._groups = []
+        by_pattern = {}
+        for spec in rules:
+            rule = MetricRule(**spec)
+            self.rules[rule.name] = rule
+            if rule.pattern not in by_pattern:
+                by_pattern[rule.pattern] = (rule.regex, [])
+                self._groups.append(by_pattern[rule.pattern])
+            by_pattern[rule.pattern][1].append(rule)
+        self._scanner = re.compile("|".join(f"(?:{pattern})" for pattern in by_pattern))
+
+    @property
+    def metric_names(self) -> list:
+        return list(self.rules)
+
+    def empty_analysis(self) -> dict:
+        return {name: {"value": "N/A", "status": "Unknown"} for name in self.rules}
+
+    def scan(self, text: str, found: dict) -> bool:
+        """Add the first reading of each missing metric in text to found.
+
+        Returns True once every metric has a reading.
+        """
+        pending = [(regex, [r for r in rules if r.name not in found]) for regex, rules in self._groups]
+        pending = [(regex, rules) for regex, rules in pending if rules]
+        pos = 0
+        while pending:
+            hit = self._scanner.search(text, pos)
+            if hit is None:
+                break
+            start = hit.start()
+            still_pending = []
+            for regex, rules in pending:
+                match = regex.match(text, start)
+                if match is None:
+                    still_pending.append((regex, rules))
+                    continue
+                for rule in rules:
+                    found[rule.name] = rule.reading(match)
+            pending = still_pending
+            pos = start + 1
+        return len(found) == len(self.rules)
+
+    def extract(self, text: str) -> dict:
+        """Return a complete analysis for a single block of text"""
+        found = {}
+        self.scan(text, found)
+        analysis = self.empty_analysis()
+        analysis.update(found)
+        return analysis
+
+def load_metric_rules() -> list:
+    """Load extraction rules from METRIC_RULES_FILE, falling back to the defaults"""
+    if Config.METRIC_RULES_FILE:
+        with open(Config.METRIC_RULES_FILE) as f:
+            return json.load(f)
+    return DEFAULT_METRIC_RULES
+
+_metric_extractor_instance = None
+
+def get_metric_extractor():
+    global _metric_extractor_instance
+    if _metric_extractor_instance is None:
+        _metric_extractor_instance = MetricExtractor(load_metric_rules())
+    return _metric_extractor_instance
@@ -1,11 +1,8 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
-import threading
 import json
 import os
 from backend.config.config import Config
+from backend.app.utils.mail_queue import get_mail_queue
 
 class NotificationUtils:
     _instance = None
@@ -31,30 +28,8 @@ class NotificationUtils:
             print("Email notifications are disabled. Please configure email settings.")
             return False
 
-        def send_async():
-            try:
-                msg = MIMEMultipart()
-                msg['From'] = self.sender_email
-                msg['To'] = recipient
-                msg['Subject'] = subject
-                
-                msg.attach(MIMEText(message, 'plain'))
-                
-                server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=5)
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                server.send_message(msg)
-                server.quit()
-                return True
-            except Exception as e:
-                print(f"Email error: {str(e)}")
-                return False
-
-        # Send email in a separate thread
-        thread = threading.Thread(target=send_async)
-        thread.daemon = True
-        thread.start()
-        return True
+        # Delivered by the pooled SMTP senders of the mail queue
+        return get_mail_queue().send(recipient, subject, message)
 
     def send_appointment_reminder(self, patient_email: str, doctor_name: str, appointment_date: str):
         """Send appointment reminder"""
@@ -70,27 +45,6 @@ class NotificationUtils:
         
         return self.send_email(patient_email, subject, message)
 
-    def start_reminder_thread(self, appointment_date: datetime, patient_email: str, doctor_name: str):
-        """Start a thread to send reminder 24 hours before appointment"""
-        if not self.email_enabled:
-            return
-
-        reminder_date = appointment_date - timedelta(days=1)
-        current_time = datetime.now()
-        delay = (reminder_date - current_time).total_seconds()
-        
-        if delay > 0:
-            def send_reminder():
-                self.send_appointment_reminder(
-                    patient_email,
-                    doctor_name,
-                    appointment_date.strftime("%Y-%m-%d %H:%M")
-                )
-            
-            timer = threading.Timer(delay, send_reminder)
-            timer.daemon = True
-            timer.start()
-
 _notification_utils_instance = None
 
 def get_notification_utils():
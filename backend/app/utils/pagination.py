@@ -0,0 +1,61 @@
+from flask import current_app, request
+from sqlalchemy import tuple_
+from datetime import datetime
+import base64
+import json
+
+class InvalidCursor(ValueError):
+    pass
+
+class Page:
+    def __init__(self, items: list, next_cursor: str = None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Opaque cursor for the position just after (sort_value, row_id)"""
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid pagination cursor")
+
+def page_args():
+    """Read ``cursor`` and ``limit`` from the query string, clamping the limit"""
+    default = current_app.config['PAGE_SIZE']
+    maximum = current_app.config['PAGE_SIZE_MAX']
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        limit = default
+    return request.args.get('cursor') or None, max(1, min(limit, maximum))
+
+def paginate_keyset(query, sort_column, id_column, cursor: str = None, limit: int = 50) -> Page:
+    """Return one page of ``query`` ordered newest first by (sort_column, id_column).
+
+    Instead of an OFFSET, the cursor carries the sort key of the last row of
+    the previous page and the next page starts strictly after it. Each page
+    is then an index range scan whatever its depth, and rows inserted while
+    a client pages through never shift or repeat entries. The id breaks ties
+    between rows with the same timestamp.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows)
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key)))
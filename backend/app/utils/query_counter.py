@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+from flask import g, has_app_context, request
+from sqlalchemy import event
+import threading
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryCounter:
+    """Counts SQL statements executed on the current thread while active"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def record(self, statement: str):
+        self.count += 1
+        self.statements.append(statement)
+
+_local = threading.local()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, 'counters', ()):
+        counter.record(statement)
+    if has_app_context() and 'query_counter' in g:
+        g.query_counter.record(statement)
+
+def install_query_counter(engine):
+    """Attach the statement listener to an engine once"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+
+@contextmanager
+def count_queries():
+    """Yield a QueryCounter for the statements run inside the block"""
+    counter = QueryCounter()
+    counters = getattr(_local, 'counters', [])
+    _local.counters = counters + [counter]
+    try:
+        yield counter
+    finally:
+        _local.counters = [c for c in _local.counters if c is not counter]
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail with QueryBudgetExceeded if the block runs more than ``limit`` statements"""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        raise QueryBudgetExceeded(_describe(f"{counter.count} queries, limit {limit}", counter))
+
+def _describe(summary: str, counter: QueryCounter) -> str:
+    return summary + ':\n' + '\n'.join(f"  {statement}" for statement in counter.statements)
+
+def init_query_budget(app, engine):
+    """Enforce ``MAX_QUERIES_PER_REQUEST`` on every request of ``app``.
+
+    Meant for tests and development: a request that runs more statements
+    than the budget raises QueryBudgetExceeded, so an N+1 regression fails
+    loudly instead of getting slower as data grows.
+    """
+    limit = app.config.get('MAX_QUERIES_PER_REQUEST')
+    install_query_counter(engine)
+    if not limit:
+        return
+
+    @app.before_request
+    def start_query_budget():
+        g.query_counter = QueryCounter()
+
+    @app.after_request
+    def check_query_budget(response):
+        counter = g.pop('query_counter', None)
+        if counter is not None and counter.count > limit:
+            raise QueryBudgetExceeded(_describe(
+                f"{request.method} {request.path} ran {counter.count} queries, limit {limit}", counter
+            ))
+        return response
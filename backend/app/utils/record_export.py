@@ -0,0 +1,200 @@
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+import csv
+import io
+import json
+import os
+import zipfile
+import zlib
+from backend.app import db
+from backend.app.models import Appointment, HealthRecord, PatientProfile, DoctorProfile, FileAttachment
+from backend.utils.encryption_utils import get_encryption_utils
+
+# Streaming exports of a patient's full record. Rows are read with yield_per,
+# which keeps a server-side cursor open and loads ``batch_size`` rows at a
+# time, and output is handed to the response in chunks as it is produced,
+# so memory stays flat however long the patient's history is.
+
+CSV_SECTIONS = {
+    'appointments': ['id', 'date', 'status', 'doctor', 'reason', 'notes', 'created_at'],
+    'health_records': ['id', 'record_type', 'title', 'content', 'appointment_id', 'created_at', 'updated_at', 'attachments'],
+}
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def iter_appointments(user_id: int, batch_size: int):
+    statement = select(Appointment).where(Appointment.user_id == user_id).options(
+        joinedload(Appointment.doctor).joinedload(DoctorProfile.user)
+    ).order_by(Appointment.id).execution_options(yield_per=batch_size)
+    yield from db.session.scalars(statement)
+
+def iter_health_records(user_id: int, batch_size: int):
+    # selectinload runs one attachments query per batch of records
+    statement = select(HealthRecord).join(HealthRecord.patient).where(
+        PatientProfile.user_id == user_id
+    ).options(selectinload(HealthRecord.attachments)).order_by(HealthRecord.id).execution_options(
+        yield_per=batch_size
+    )
+    yield from db.session.scalars(statement)
+
+def iter_attachments(user_id: int, batch_size: int):
+    statement = select(FileAttachment).join(FileAttachment.health_record).join(HealthRecord.patient).where(
+        PatientProfile.user_id == user_id
+    ).order_by(FileAttachment.id).execution_options(yield_per=batch_size)
+    yield from db.session.scalars(statement)
+
+def appointment_row(appointment: Appointment) -> dict:
+    doctor = appointment.doctor
+    return {
+        'id': appointment.id,
+        'date': _isoformat(appointment.appointment_date),
+        'status': appointment.status,
+        'doctor': f"Dr. {doctor.user.first_name} {doctor.user.last_name}" if doctor else None,
+        'reason': appointment.reason,
+        'notes': appointment.notes,
+        'created_at': _isoformat(appointment.created_at)
+    }
+
+def health_record_row(record: HealthRecord) -> dict:
+    return {
+        'id': record.id,
+        'record_type': record.record_type,
+        'title': record.title,
+        'content': record.content,
+        'appointment_id': record.appointment_id,
+        'created_at': _isoformat(record.created_at),
+        'updated_at': _isoformat(record.updated_at),
+        'attachments': [{
+            'id': a.id,
+            'filename': a.filename,
+            'file_type': a.file_type,
+            'file_size': a.file_size,
+            'uploaded_at': _isoformat(a.uploaded_at),
+            'extraction_status': a.extraction_status,
+            'extracted_data': a.extracted_data
+        } for a in record.attachments]
+    }
+
+def _buffered(pieces, chunk_size: int):
+    """Join small string pieces into chunks of about ``chunk_size`` bytes"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+def iter_ndjson(user_id: int, batch_size: int, chunk_size: int):
+    """One JSON object per line: every appointment, then every health record"""
+    def lines():
+        for appointment in iter_appointments(user_id, batch_size):
+            yield json.dumps(dict(type='appointment', **appointment_row(appointment))) + '\n'
+        for record in iter_health_records(user_id, batch_size):
+            yield json.dumps(dict(type='health_record', **health_record_row(record))) + '\n'
+    return _buffered(lines(), chunk_size)
+
+def iter_csv(user_id: int, section: str, batch_size: int, chunk_size: int):
+    """One CSV section (see CSV_SECTIONS) with a header row"""
+    columns = CSV_SECTIONS[section]
+    if section == 'appointments':
+        rows = (appointment_row(a) for a in iter_appointments(user_id, batch_size))
+    else:
+        rows = (dict(health_record_row(r), attachments=';'.join(a.filename for a in r.attachments))
+                for r in iter_health_records(user_id, batch_size))
+
+    def lines():
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        yield out.getvalue()
+    return _buffered(lines(), chunk_size)
+
+def gzip_chunks(chunks):
+    """Compress a stream of byte chunks into a single gzip member"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable target that hands out what zipfile wrote so far.
+
+    Because it cannot seek, zipfile writes sizes and CRCs in data
+    descriptors after each entry instead of going back to patch headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_zip(user_id: int, batch_size: int, chunk_size: int):
+    """A zip of ``record.ndjson`` plus every attachment, decrypted on the fly"""
+    return (chunk for chunk in _zip_chunks(user_id, batch_size, chunk_size) if chunk)
+
+def _zip_chunks(user_id: int, batch_size: int, chunk_size: int):
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('record.ndjson', 'w', force_zip64=True) as entry:
+            for chunk in iter_ndjson(user_id, batch_size, chunk_size):
+                entry.write(chunk)
+                yield sink.take()
+
+        for attachment in iter_attachments(user_id, batch_size):
+            name = f"attachments/{attachment.health_record_id}/{attachment.id}_{attachment.filename}"
+            if not os.path.exists(attachment.file_path):
+                print(f"Export skipped missing file of attachment {attachment.id}")
+                archive.writestr(f"{name}.error.txt", "This attachment's file is missing and is not included.\n")
+                yield sink.take()
+                continue
+            chunks = _attachment_chunks(attachment.file_path, chunk_size)
+            try:
+                # Read the first chunk before the entry exists, so an unreadable file adds no empty entry
+                first = next(chunks, b'')
+            except Exception as e:
+                print(f"Export skipped unreadable file of attachment {attachment.id}: {str(e)}")
+                archive.writestr(f"{name}.error.txt", "This attachment could not be read and is not included.\n")
+                yield sink.take()
+                continue
+            try:
+                with archive.open(name, 'w', force_zip64=True) as entry:
+                    entry.write(first)
+                    yield sink.take()
+                    for chunk in chunks:
+                        entry.write(chunk)
+                        yield sink.take()
+            except Exception as e:
+                # Part of the entry is already sent, so flag it as incomplete in the archive too
+                print(f"Export error for attachment {attachment.id}: {str(e)}")
+                archive.writestr(f"{name}.error.txt", "This attachment could not be read to the end; the exported file is incomplete.\n")
+            yield sink.take()
+    yield sink.take()
+
+def _attachment_chunks(file_path: str, chunk_size: int):
+    """Plaintext of an attachment file; files saved before encryption was added are read as stored"""
+    if file_path.endswith('.enc'):
+        yield from get_encryption_utils().iter_decrypt(file_path)
+        return
+    with open(file_path, 'rb') as f:
+        yield from iter(lambda: f.read(chunk_size), b'')
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from flask import current_app
+import heapq
+import threading
+import os
+from backend.app import db
+from backend.app.models import Appointment
+from backend.app.utils.notification_utils import get_notification_utils
+
+class ReminderScheduler:
+    """Sends appointment reminders from a single thread per process.
+
+    The ``appointments`` table is the source of truth: every poll loads the
+    scheduled appointments whose reminder falls due before the next poll
+    (including ones missed while no process was running) into a min-heap of
+    due times, and the thread sleeps until the earliest one. A reminder is
+    claimed by setting ``reminder_sent_at`` with a conditional UPDATE, which
+    takes the row lock, so only one process on any node sends it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.lead_time = timedelta(hours=app.config['REMINDER_LEAD_HOURS'])
+        self.poll_interval = app.config['REMINDER_POLL_INTERVAL']
+        self._heap = []
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        """Start the scheduler thread once per process"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._heap, self._queued = [], set()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+            self._thread.start()
+
+    def schedule(self, appointment: Appointment):
+        """Queue a newly booked appointment without waiting for the next poll"""
+        due = appointment.appointment_date - self.lead_time
+        if due <= datetime.now() + timedelta(seconds=self.poll_interval):
+            self._push(due, appointment.id)
+            self._wakeup.set()
+
+    def _push(self, due: datetime, appointment_id: int):
+        with self._lock:
+            if appointment_id not in self._queued:
+                self._queued.add(appointment_id)
+                heapq.heappush(self._heap, (due, appointment_id))
+
+    def _run(self):
+        next_poll = datetime.now()
+        while True:
+            try:
+                now = datetime.now()
+                if now >= next_poll:
+                    self._load_due(now + timedelta(seconds=self.poll_interval))
+                    next_poll = now + timedelta(seconds=self.poll_interval)
+
+                for appointment_id in self._pop_due(now):
+                    self._send(appointment_id)
+
+                with self._lock:
+                    wake_at = min(self._heap[0][0], next_poll) if self._heap else next_poll
+            except Exception as e:
+                print(f"Reminder scheduler error: {str(e)}")
+                wake_at = datetime.now() + timedelta(seconds=self.poll_interval)
+
+            self._wakeup.wait(max(0.0, (wake_at - datetime.now()).total_seconds()))
+            self._wakeup.clear()
+
+    def _load_due(self, until: datetime):
+        """Load unsent reminders due before ``until``, including overdue ones"""
+        now = datetime.now()
+        with self.app.app_context():
+            rows = db.session.query(Appointment.id, Appointment.appointment_date).filter(
+                Appointment.status == 'scheduled',
+                Appointment.reminder_sent_at.is_(None),
+                Appointment.appointment_date > now,
+                Appointment.appointment_date <= until + self.lead_time
+            ).all()
+        for appointment_id, appointment_date in rows:
+            self._push(appointment_date - self.lead_time, appointment_id)
+
+    def _pop_due(self, now: datetime) -> list:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, appointment_id = heapq.heappop(self._heap)
+                self._queued.discard(appointment_id)
+                due.append(appointment_id)
+        return due
+
+    def _send(self, appointment_id: int):
+        now = datetime.now()
+        with self.app.app_context():
+            claimed = Appointment.query.filter(
+                Appointment.id == appointment_id,
+                Appointment.status == 'scheduled',
+                Appointment.reminder_sent_at.is_(None),
+                Appointment.appointment_date > now,
+                Appointment.appointment_date <= now + self.lead_time
+            ).update({'reminder_sent_at': now}, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                return
+
+            appointment = db.session.get(Appointment, appointment_id)
+            doctor = appointment.doctor.user
+            get_notification_utils().send_appointment_reminder(
+                appointment.user.email,
+                f"{doctor.first_name} {doctor.last_name}",
+                appointment.appointment_date.strftime("%Y-%m-%d %H:%M")
+            )
+
+_reminder_scheduler_instance = None
+
+def get_reminder_scheduler():
+    global _reminder_scheduler_instance
+    if _reminder_scheduler_instance is None:
+        _reminder_scheduler_instance = ReminderScheduler(current_app._get_current_object())
+    return _reminder_scheduler_instance
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+import pickle
+import sqlite3
+import threading
+import time
+from backend.app.models import User, DoctorProfile, PatientProfile, Appointment, HealthRecord
+from backend.app.utils.db_routing import primary_reads
+
+class MemoryCacheBackend:
+    """Per-process TTL + LRU cache.
+
+    Only invalidations made by the same process reach it, so with several
+    gunicorn workers an entry can be stale for up to its TTL.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+class SQLiteCacheBackend:
+    """TTL + LRU cache in a SQLite file shared by every worker on the host"""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value, ttl: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl, now)
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            conn.execute("""
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def delete_prefix(self, prefix: str):
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',))
+
+class ResponseCache:
+    """Caches per-user view data such as dashboards and profiles.
+
+    Entries are keyed ``user:<id>:<name>``, so one user's data is never
+    served to another, and expire after ``RESPONSE_CACHE_TTL`` seconds.
+    Commits that touch a user's appointments, health records or profile
+    drop all of that user's entries (see ``init_response_cache``). Entries
+    are always built from the primary database: one built from a lagging
+    read replica would stay stale for the whole TTL, as the commit it missed
+    has already invalidated the user's entries.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _prefix(user_id: int) -> str:
+        return f"user:{user_id}:"
+
+    def get_or_set(self, user_id: int, name: str, build):
+        """Return the cached value of ``name`` for the user, building it on a miss"""
+        if self.backend is None:
+            return build()
+        key = self._prefix(user_id) + name
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        with primary_reads():
+            value = build()
+        self.backend.set(key, value, self.ttl)
+        return value
+
+    def invalidate_user(self, user_id: int):
+        if self.backend is not None:
+            self.backend.delete_prefix(self._prefix(user_id))
+
+def _affected_users(session, obj) -> set:
+    """Ids of the users whose cached data shows ``obj``"""
+    connection = session.connection()
+
+    def values(attr):
+        # Current value plus the value it replaced, if it changed
+        state = inspect(obj)
+        history = state.attrs[attr].history
+        found = set(history.added) | set(history.deleted) | set(history.unchanged) | {state.dict.get(attr)}
+        return {v for v in found if v is not None}
+
+    if isinstance(obj, User):
+        return {obj.id}
+    if isinstance(obj, (DoctorProfile, PatientProfile)):
+        return values('user_id')
+    if isinstance(obj, Appointment):
+        doctor_ids = values('doctor_id')
+        doctors = set(connection.execute(
+            select(DoctorProfile.user_id).where(DoctorProfile.id.in_(doctor_ids))
+        ).scalars()) if doctor_ids else set()
+        return values('user_id') | doctors
+    if isinstance(obj, HealthRecord):
+        patient_ids = values('patient_id')
+        return set(connection.execute(
+            select(PatientProfile.user_id).where(PatientProfile.id.in_(patient_ids))
+        ).scalars()) if patient_ids else set()
+    return set()
+
+_CACHED_MODELS = (User, DoctorProfile, PatientProfile, Appointment, HealthRecord)
+
+def _after_flush(session, flush_context):
+    pending = session.info.setdefault('response_cache_users', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _CACHED_MODELS):
+            pending |= _affected_users(session, obj)
+    pending.discard(None)
+
+def _after_commit(session):
+    users = session.info.pop('response_cache_users', None)
+    if users and has_app_context():
+        cache = get_response_cache()
+        for user_id in users:
+            cache.invalidate_user(user_id)
+
+def _after_rollback(session):
+    session.info.pop('response_cache_users', None)
+
+def init_response_cache(session):
+    """Invalidate cached entries of every user touched by a committed transaction"""
+    if not event.contains(session, 'after_flush', _after_flush):
+        event.listen(session, 'after_flush', _after_flush)
+        event.listen(session, 'after_commit', _after_commit)
+        event.listen(session, 'after_rollback', _after_rollback)
+
+def create_response_cache(config) -> ResponseCache:
+    backend_name = config['RESPONSE_CACHE_BACKEND']
+    if backend_name == 'sqlite':
+        backend = SQLiteCacheBackend(config['RESPONSE_CACHE_PATH'], config['RESPONSE_CACHE_MAX_ENTRIES'])
+    elif backend_name == 'memory':
+        backend = MemoryCacheBackend(config['RESPONSE_CACHE_MAX_ENTRIES'])
+    else:
+        backend = None
+    return ResponseCache(backend, config['RESPONSE_CACHE_TTL'])
+
+_response_cache_instance = None
+
+def get_response_cache():
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        _response_cache_instance = create_response_cache(current_app.config)
+    return _response_cache_instance
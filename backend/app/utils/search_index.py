@@ -0,0 +1,174 @@
+from sqlalchemy import event, text, bindparam, select, table, column, literal_column, func, desc
+import re
+from backend.app.models import HealthRecord, FileAttachment
+
+# Full-text index over health records: title, content and the extracted text of
+# their attachments, one row per record. SQLite uses an FTS5 table keyed by
+# the record id (with prefix indexes for 2 and 3 characters); PostgreSQL keeps
+# a weighted tsvector per record behind a GIN index. Rows are rewritten in the
+# same flush as the change to the record or its attachments.
+
+SEARCH_TABLE = 'health_record_search'
+MAX_TERMS = 10
+
+SEARCH_DDL = {
+    'sqlite': [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+            title, content, attachment_text, patient_id UNINDEXED,
+            tokenize = 'porter unicode61', prefix = '2 3'
+        )""",
+    ],
+    'postgresql': [
+        f"""CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+            record_id INTEGER PRIMARY KEY,
+            patient_id INTEGER NOT NULL,
+            document TSVECTOR NOT NULL
+        )""",
+        f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+        f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_patient_id ON {SEARCH_TABLE} (patient_id)",
+    ],
+}
+
+_ATTACHMENT_TEXT = {
+    'sqlite': "SELECT group_concat(a.extracted_text, ' ') FROM file_attachments a WHERE a.health_record_id = r.id",
+    'postgresql': "SELECT string_agg(a.extracted_text, ' ') FROM file_attachments a WHERE a.health_record_id = r.id",
+}
+
+_REINDEX = {
+    'sqlite': f"""
+        INSERT INTO {SEARCH_TABLE} (rowid, title, content, attachment_text, patient_id)
+        SELECT r.id, r.title, r.content, COALESCE(({_ATTACHMENT_TEXT['sqlite']}), ''), r.patient_id
+        FROM health_records r WHERE r.id IN :ids AND r.patient_id IS NOT NULL
+    """,
+    'postgresql': f"""
+        INSERT INTO {SEARCH_TABLE} (record_id, patient_id, document)
+        SELECT r.id, r.patient_id,
+               setweight(to_tsvector('english', COALESCE(r.title, '')), 'A') ||
+               setweight(to_tsvector('english', COALESCE(r.content, '')), 'B') ||
+               setweight(to_tsvector('english', COALESCE(({_ATTACHMENT_TEXT['postgresql']}), '')), 'C')
+        FROM health_records r WHERE r.id IN :ids AND r.patient_id IS NOT NULL
+    """,
+}
+
+_KEY_COLUMN = {'sqlite': 'rowid', 'postgresql': 'record_id'}
+
+def search_supported(connection) -> bool:
+    return connection.dialect.name in SEARCH_DDL
+
+def create_search_index(connection):
+    for statement in SEARCH_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+def drop_search_index(connection):
+    if search_supported(connection):
+        connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+def reindex_records(connection, record_ids) -> int:
+    """Rewrite the index rows of the given records from their current data"""
+    dialect = connection.dialect.name
+    record_ids = list(record_ids)
+    if not record_ids or not search_supported(connection):
+        return 0
+    ids = bindparam('ids', expanding=True)
+    connection.execute(
+        text(f"DELETE FROM {SEARCH_TABLE} WHERE {_KEY_COLUMN[dialect]} IN :ids").bindparams(ids),
+        {'ids': record_ids}
+    )
+    return connection.execute(text(_REINDEX[dialect]).bindparams(ids), {'ids': record_ids}).rowcount
+
+def rebuild_search_index(connection, batch_size: int = 1000) -> int:
+    """Index every health record, in batches of ``batch_size``"""
+    drop_search_index(connection)
+    create_search_index(connection)
+    indexed = 0
+    last_id = 0
+    while True:
+        ids = connection.execute(
+            text("SELECT id FROM health_records WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {'last_id': last_id, 'limit': batch_size}
+        ).scalars().all()
+        if not ids:
+            return indexed
+        indexed += reindex_records(connection, ids)
+        last_id = ids[-1]
+
+def _changed_record_ids(session) -> set:
+    ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, HealthRecord):
+            ids.add(obj.id)
+        elif isinstance(obj, FileAttachment):
+            ids.add(obj.health_record_id)
+    ids.discard(None)
+    return ids
+
+def _after_flush(session, flush_context):
+    record_ids = _changed_record_ids(session)
+    if record_ids:
+        reindex_records(session.connection(), record_ids)
+
+def _after_create(target, connection, **kw):
+    create_search_index(connection)
+
+def _before_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+def init_search_index(session):
+    """Keep the search index in step with health records and attachments.
+
+    Also creates and drops the index table together with the
+    file_attachments table, so ``db.create_all()`` sets it up.
+    """
+    if not event.contains(session, 'after_flush', _after_flush):
+        event.listen(session, 'after_flush', _after_flush)
+    attachments = FileAttachment.__table__
+    if not event.contains(attachments, 'after_create', _after_create):
+        event.listen(attachments, 'after_create', _after_create)
+        event.listen(attachments, 'before_drop', _before_drop)
+
+def parse_query(query: str) -> list:
+    """(term, is_prefix) pairs of a user query; ``term*`` asks for a prefix match"""
+    return [(term.lower(), star == '*') for term, star in re.findall(r'(\w+)(\*?)', query)][:MAX_TERMS]
+
+def _match_expression(dialect: str, terms: list) -> str:
+    if dialect == 'sqlite':
+        # Quoted terms cannot be read as FTS5 operators or column filters
+        return ' '.join(f'"{term}"' + ('*' if prefix else '') for term, prefix in terms)
+    return ' & '.join(term + (':*' if prefix else '') for term, prefix in terms)
+
+def search_records(session, query: str, patient_ids, limit: int, offset: int = 0) -> list:
+    """Ranked (record_id, score, snippet) matches among the given patients' records.
+
+    Every term must match. ``patient_ids`` is a list or a subquery of
+    patient_profiles ids, which is how the access rules are applied.
+    """
+    terms = parse_query(query)
+    connection = session.connection()
+    dialect = connection.dialect.name
+    if not terms or not search_supported(connection):
+        return []
+    match = _match_expression(dialect, terms)
+
+    if dialect == 'sqlite':
+        search = table(SEARCH_TABLE, column('rowid'), column('patient_id'))
+        # bm25 weights title over content over attachment text; it is lower for better matches
+        statement = select(
+            search.c.rowid,
+            literal_column(f"-bm25({SEARCH_TABLE}, 10.0, 4.0, 1.0)").label('score'),
+            literal_column(f"snippet({SEARCH_TABLE}, -1, '[', ']', '...', 12)").label('snippet')
+        ).where(text(f"{SEARCH_TABLE} MATCH :match").bindparams(match=match))
+        key = search.c.rowid
+    else:
+        search = table(SEARCH_TABLE, column('record_id'), column('patient_id'), column('document'))
+        tsquery = func.to_tsquery('english', match)
+        statement = select(
+            search.c.record_id,
+            func.ts_rank_cd(search.c.document, tsquery).label('score'),
+            func.ts_headline('english', HealthRecord.content, tsquery,
+                             'StartSel=[, StopSel=], MaxWords=24, MinWords=8').label('snippet')
+        ).join(HealthRecord, HealthRecord.id == search.c.record_id).where(search.c.document.op('@@')(tsquery))
+        key = search.c.record_id
+    statement = statement.where(search.c.patient_id.in_(patient_ids)).order_by(
+        desc('score'), key.desc()
+    ).limit(limit).offset(offset)
+    return connection.execute(statement).all()
@@ -0,0 +1,110 @@
+"""
+Local SMTP sink for development, benchmarks and tests.
+
+Accepts any login and every message, keeps them in memory and never
+delivers anything. Run it standalone with:
+
+    python -m backend.app.utils.smtp_sink --port 1025
+
+and point MAIL_SERVER/MAIL_PORT at it with MAIL_USE_TLS=false.
+"""
+import argparse
+import socketserver
+import threading
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply('220 smtp-sink ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self._reply('250-smtp-sink')
+                self._reply('250-AUTH PLAIN LOGIN')
+                self._reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self._reply('250 smtp-sink')
+            elif verb == 'AUTH':
+                if command.upper().startswith('AUTH LOGIN'):
+                    # Username and password prompts; any credentials are accepted
+                    for _ in range(2 - len(command.split()[2:])):
+                        self._reply('334 VXNlcm5hbWU6')
+                        self.rfile.readline()
+                self._reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].strip(), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip())
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in iter(self.rfile.readline, b''):
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data[1:] if data.startswith(b'..') else data)
+                with server.lock:
+                    server.messages.append({
+                        'sender': sender,
+                        'recipients': recipients,
+                        'data': b''.join(lines)
+                    })
+                sender, recipients = None, []
+                self._reply('250 OK: queued')
+            elif verb in ('RSET', 'NOOP'):
+                sender, recipients = (None, []) if verb == 'RSET' else (sender, recipients)
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self):
+        """Serve from a background thread and return self"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local SMTP sink.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port)
+    print(f"SMTP sink listening on {args.host}:{sink.port}")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Received {len(sink.messages)} message(s) over {sink.connections} connection(s)")
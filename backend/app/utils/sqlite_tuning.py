@@ -0,0 +1,83 @@
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+import random
+import time
+
+# SQLite result codes (the low byte of extended codes) for a locked database
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+def _pragmas(config, in_memory: bool) -> list:
+    pragmas = []
+    if config['SQLITE_JOURNAL_MODE'] and not in_memory:
+        pragmas.append(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+    if config['SQLITE_SYNCHRONOUS']:
+        pragmas.append(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+    if config['SQLITE_BUSY_TIMEOUT_MS']:
+        pragmas.append(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    if config['SQLITE_MMAP_SIZE'] and not in_memory:
+        pragmas.append(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+    if config['SQLITE_CACHE_SIZE_KB']:
+        # Negative sizes are in KiB rather than pages
+        pragmas.append(f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}")
+    return pragmas
+
+def init_sqlite_pragmas(app, engine):
+    """Tune every new connection of a SQLite engine for concurrent workers.
+
+    WAL lets readers and one writer work at the same time, and with
+    synchronous=NORMAL a commit no longer waits for an fsync (WAL keeps the
+    database consistent; only the last commits can be lost on power
+    failure). busy_timeout makes a writer wait for the lock instead of
+    failing at once. Other databases are left alone.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = _pragmas(app.config, engine.url.database in (None, '', ':memory:'))
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def is_busy_error(error: Exception) -> bool:
+    """Whether an error is SQLite reporting a locked database"""
+    if not isinstance(error, OperationalError):
+        return False
+    code = getattr(error.orig, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (SQLITE_BUSY, SQLITE_LOCKED)
+    return 'database is locked' in str(error.orig) or 'database table is locked' in str(error.orig)
+
+def commit_with_retry(session, work, attempts: int = None, base_delay: float = None):
+    """Run ``work()`` and commit, starting over when SQLite reports a lock.
+
+    ``work`` makes the changes (adds rows, sets attributes) and is called
+    again after every rollback, so it must not depend on state from an
+    earlier attempt. Retries wait a random time up to ``base_delay``
+    doubled per attempt (full jitter), so writers that collided do not
+    collide again. Returns what ``work`` returned.
+    """
+    if attempts is None:
+        attempts = current_app.config['WRITE_RETRY_ATTEMPTS']
+    if base_delay is None:
+        base_delay = current_app.config['WRITE_RETRY_BASE_DELAY']
+    attempt = 0
+    while True:
+        try:
+            result = work()
+            session.commit()
+            return result
+        except OperationalError as e:
+            session.rollback()
+            if attempt >= attempts or not is_busy_error(e):
+                raise
+            time.sleep(random.uniform(0, base_delay * 2 ** attempt))
+            attempt += 1
@@ -16,11 +16,101 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         f'sqlite:///{os.path.join(INSTANCE_DIR, "health_records.db")}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    MAX_QUERIES_PER_REQUEST = int(os.environ.get('MAX_QUERIES_PER_REQUEST', 0))  # 0 disables the check
+    
+    # Connection pool (turned into SQLALCHEMY_ENGINE_OPTIONS by create_app)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # replace connections older than this
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))  # PostgreSQL only; 0 disables
+    
+    # Read replicas for @read_only request handlers (comma-separated URLs; none routes everything to the primary)
+    DB_REPLICA_URLS = [url.strip() for url in os.environ.get('DB_REPLICA_URLS', '').split(',') if url.strip()]
+    DB_REPLICA_HEALTH_INTERVAL = float(os.environ.get('DB_REPLICA_HEALTH_INTERVAL', 10))  # seconds between checks
+    DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 30))  # seconds; PostgreSQL only
+    DB_READ_YOUR_WRITES_SECONDS = float(os.environ.get('DB_READ_YOUR_WRITES_SECONDS', 5))  # primary-only after a commit
+    
+    # SQLite connection pragmas (empty or 0 leaves SQLite's default) and retries of locked writes
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 16 * 1024))  # per connection
+    WRITE_RETRY_ATTEMPTS = int(os.environ.get('WRITE_RETRY_ATTEMPTS', 5))
+    WRITE_RETRY_BASE_DELAY = float(os.environ.get('WRITE_RETRY_BASE_DELAY', 0.02))  # seconds, doubled per attempt
+    
+    # Schema changes are applied by 'flask schema upgrade' (Alembic), never by
+    # the processes serving requests; only throwaway databases are created on startup
+    CREATE_SCHEMA_ON_STARTUP = os.environ.get('CREATE_SCHEMA_ON_STARTUP', 'false').lower() == 'true'
+    
+    # Keep appointment_counters in step with appointments and read stats from it
+    APPOINTMENT_COUNTERS_ENABLED = os.environ.get('APPOINTMENT_COUNTERS_ENABLED', 'false').lower() == 'true'
+    
+    # Per-user cache of dashboard and profile data: sqlite (shared by workers), memory or none.
+    # memory is per process, so only the worker that committed a change sees it before the TTL
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'sqlite')
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 60))  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+    RESPONSE_CACHE_PATH = os.environ.get('RESPONSE_CACHE_PATH') or os.path.join(INSTANCE_DIR, 'response_cache.db')
+    
+    # Live appointment events (Server-Sent Events at /api/events)
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 1.0))  # seconds; Postgres uses LISTEN/NOTIFY
+    EVENTS_HEARTBEAT_INTERVAL = float(os.environ.get('EVENTS_HEARTBEAT_INTERVAL', 15))
+    EVENTS_STREAM_TIMEOUT = float(os.environ.get('EVENTS_STREAM_TIMEOUT', 300))  # clients reconnect after this
+    EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 3000))
+    EVENTS_REPLAY_LIMIT = int(os.environ.get('EVENTS_REPLAY_LIMIT', 500))
+    EVENTS_RETENTION_HOURS = int(os.environ.get('EVENTS_RETENTION_HOURS', 24))
+    
+    # Listing pagination
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 200))  # largest ?limit= a client may ask for
+    
+    # Bulk export
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 500))  # rows fetched per round trip
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 64 * 1024))  # bytes per response chunk
     
     # File upload configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
     
+    # Background document extraction
+    EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', 2))
+    EXTRACTION_MAX_RETRIES = int(os.environ.get('EXTRACTION_MAX_RETRIES', 3))
+    EXTRACTION_RETRY_DELAY = int(os.environ.get('EXTRACTION_RETRY_DELAY', 5))  # seconds, doubled per attempt
+    EXTRACTION_JOB_TIMEOUT = int(os.environ.get('EXTRACTION_JOB_TIMEOUT', 600))  # seconds before a job counts as stalled
+    # Page pool for large PDFs analyzed outside the extraction workers, which read pages themselves
+    PDF_EXTRACTION_WORKERS = int(os.environ.get('PDF_EXTRACTION_WORKERS', 4))
+    PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 20))
+    PDF_PAGES_PER_CHUNK = int(os.environ.get('PDF_PAGES_PER_CHUNK', 10))
+    PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 0))  # 0 reads every page
+    # Opt in to searching attachment text: it is then copied out of the encrypted
+    # files into file_attachments and the search index, protected only as well as the database
+    SEARCH_INDEX_DOCUMENT_TEXT = os.environ.get('SEARCH_INDEX_DOCUMENT_TEXT', 'false').lower() == 'true'
+    EXTRACTED_TEXT_MAX_CHARS = int(os.environ.get('EXTRACTED_TEXT_MAX_CHARS', 200000))  # document text kept for search
+    METRIC_RULES_FILE = os.environ.get('METRIC_RULES_FILE')  # JSON list of metric extraction rules
+    HEALTH_ANALYSIS_WINDOW = int(os.environ.get('HEALTH_ANALYSIS_WINDOW', 3))  # readings per rolling mean
+    HEALTH_ANALYSIS_Z_THRESHOLD = float(os.environ.get('HEALTH_ANALYSIS_Z_THRESHOLD', 2.0))  # |z| flagged as anomaly
+    
+    # Image OCR preprocessing
+    IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION', 2000))  # longest edge in pixels
+    IMAGE_TARGET_DPI = int(os.environ.get('IMAGE_TARGET_DPI', 300))
+    IMAGE_THRESHOLD = os.environ.get('IMAGE_THRESHOLD', 'otsu')  # otsu, adaptive or global
+    IMAGE_DESKEW = os.environ.get('IMAGE_DESKEW', 'true').lower() == 'true'
+    IMAGE_CROP_REGIONS = os.environ.get('IMAGE_CROP_REGIONS', 'true').lower() == 'true'
+    IMAGE_MIN_REGION_AREA = int(os.environ.get('IMAGE_MIN_REGION_AREA', 1000))
+    IMAGE_OCR_MAX_REGIONS = int(os.environ.get('IMAGE_OCR_MAX_REGIONS', 8))
+    IMAGE_OCR_WORKERS = int(os.environ.get('IMAGE_OCR_WORKERS', 4))
+    
+    # Extraction cache, keyed by SHA-256 of the uploaded file
+    EXTRACTION_CACHE_ENABLED = os.environ.get('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+    EXTRACTION_CACHE_PATH = os.environ.get('EXTRACTION_CACHE_PATH') or os.path.join(INSTANCE_DIR, 'extraction_cache.db')
+    EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    
+    # Bearer token required by /api/metrics, which is disabled (404) without one
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
     SESSION_COOKIE_SECURE = True
@@ -28,14 +118,28 @@ class Config:
     
     # Security configuration
     ENCRYPTION_KEY = os.environ.get('ENCRYPTION_KEY') or 'dev-encryption-key'
+    FILE_ENCRYPTION_CHUNK_SIZE = int(os.environ.get('FILE_ENCRYPTION_CHUNK_SIZE', 64 * 1024))
     
     # Email configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
-    MAIL_USE_TLS = True
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 2))  # long-lived SMTP connections per process
+    MAIL_QUEUE_SIZE = int(os.environ.get('MAIL_QUEUE_SIZE', 1000))
+    MAIL_ENQUEUE_TIMEOUT = float(os.environ.get('MAIL_ENQUEUE_TIMEOUT', 2))  # seconds to wait when the queue is full
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES', 3))
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF', 5))  # seconds, doubled per attempt
+    MAIL_IDLE_TIMEOUT = float(os.environ.get('MAIL_IDLE_TIMEOUT', 30))  # close idle SMTP connections after this
+    MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100))
+    MAIL_DEAD_LETTER_PATH = os.environ.get('MAIL_DEAD_LETTER_PATH') or os.path.join(INSTANCE_DIR, 'mail_dead_letters.db')
+    
+    # Appointment reminders
+    REMINDER_SCHEDULER_ENABLED = os.environ.get('REMINDER_SCHEDULER_ENABLED', 'true').lower() == 'true'
+    REMINDER_LEAD_HOURS = int(os.environ.get('REMINDER_LEAD_HOURS', 24))
+    REMINDER_POLL_INTERVAL = int(os.environ.get('REMINDER_POLL_INTERVAL', 300))  # seconds
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -43,6 +147,12 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    # Managed Postgres and its proxies drop idle connections after a few minutes
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 280))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
     
     @classmethod
     def init_app(cls, app):
@@ -59,8 +169,14 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CREATE_SCHEMA_ON_STARTUP = True
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
+    EXTRACTION_WORKERS = 1
+    EXTRACTION_MAX_RETRIES = 0
+    REMINDER_SCHEDULER_ENABLED = False
+    MAX_QUERIES_PER_REQUEST = 10
+    RESPONSE_CACHE_BACKEND = 'memory'
 
 config = {
     'development': DevelopmentConfig,
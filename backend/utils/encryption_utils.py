@@ -1,25 +1,124 @@
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 import os
 import json
+import struct
 from datetime import datetime
 from backend.config.config import Config
 
+# Chunked file format: a header of magic, plaintext chunk size and a random
+# nonce prefix, followed by AES-GCM chunks (ciphertext + 16 byte tag). Each
+# chunk's nonce is the prefix plus its index, and the header and a final-chunk
+# flag are bound in as associated data, so reordered, dropped or truncated
+# chunks fail authentication. A file always ends with a final chunk, which is
+# empty when the plaintext length is a multiple of the chunk size.
+FILE_MAGIC = b'PHE1'
+FILE_HEADER = struct.Struct('>4sI8s')
+TAG_SIZE = 16
+
+class ChunkedFileWriter:
+    """Encrypts a stream of bytes to a file in constant memory"""
+
+    def __init__(self, aesgcm: AESGCM, output_path: str, chunk_size: int):
+        self._aesgcm = aesgcm
+        self._chunk_size = chunk_size
+        self._header = FILE_HEADER.pack(FILE_MAGIC, chunk_size, os.urandom(8))
+        self._nonce_prefix = self._header[-8:]
+        self._buffer = bytearray()
+        self._index = 0
+        self._file = open(output_path, 'wb')
+        self._file.write(self._header)
+
+    def write(self, data: bytes):
+        self._buffer += data
+        # Keep at least one byte back so the final chunk is never written early
+        while len(self._buffer) > self._chunk_size:
+            self._write_chunk(bytes(self._buffer[:self._chunk_size]), final=False)
+            del self._buffer[:self._chunk_size]
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            if len(self._buffer) == self._chunk_size:
+                self._write_chunk(bytes(self._buffer), final=False)
+                self._buffer.clear()
+            self._write_chunk(bytes(self._buffer), final=True)
+        finally:
+            self._file.close()
+
+    def abort(self):
+        """Close without writing the final chunk, leaving an unreadable file"""
+        self._file.close()
+
+    def _write_chunk(self, data: bytes, final: bool):
+        nonce = self._nonce_prefix + struct.pack('>I', self._index)
+        self._file.write(self._aesgcm.encrypt(nonce, data, self._header + (b'\x01' if final else b'\x00')))
+        self._index += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def derive_key(secret: str) -> bytes:
+    """The Fernet key for an ENCRYPTION_KEY secret"""
+    salt = b'health_records_salt'  # Fixed salt for development
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(secret.encode()))
+
 class EncryptionUtils:
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(EncryptionUtils, cls).__new__(cls)
-            cls._instance.key = cls._instance._get_or_create_key()
-            cls._instance.cipher_suite = Fernet(cls._instance.key)
+            cls._instance._configure(cls._instance._get_or_create_key())
         return cls._instance
 
+    @classmethod
+    def for_secret(cls, secret: str):
+        """Separate utils for the key of another ENCRYPTION_KEY, e.g. while rotating keys"""
+        utils = object.__new__(cls)
+        utils._configure(derive_key(secret))
+        return utils
+
+    def _configure(self, key: bytes):
+        self.key = key
+        self.cipher_suite = Fernet(key)
+        self.file_cipher = AESGCM(self._derive_file_key())
+        self.chunk_size = Config.FILE_ENCRYPTION_CHUNK_SIZE
+
+    def _derive_file_key(self):
+        """Derive a separate AES-256 key for file encryption from the Fernet key"""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'health_records_file_encryption',
+        )
+        return hkdf.derive(base64.urlsafe_b64decode(self.key))
+
+    @staticmethod
+    def key_file() -> str:
+        return os.path.join(Config.BASE_DIR, 'instance', 'encryption.key')
+
     def _get_or_create_key(self):
         """Get existing key or create a new one"""
-        key_file = os.path.join(Config.BASE_DIR, 'instance', 'encryption.key')
+        key_file = self.key_file()
         if os.path.exists(key_file):
             with open(key_file, 'rb') as f:
                 return f.read()
@@ -31,15 +130,7 @@ class EncryptionUtils:
             return key
 
     def _generate_key(self):
-        salt = b'health_records_salt'  # Fixed salt for development
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(Config.ENCRYPTION_KEY.encode()))
-        return key
+        return derive_key(Config.ENCRYPTION_KEY)
 
     def encrypt_data(self, data: str) -> str:
         """Encrypt sensitive data before storing"""
@@ -59,28 +150,113 @@ class EncryptionUtils:
             print(f"Decryption error: {str(e)}")
             return encrypted_data
 
+    def open_encrypted_writer(self, output_path: str) -> ChunkedFileWriter:
+        """Return a writer that encrypts everything written to it into output_path"""
+        return ChunkedFileWriter(self.file_cipher, output_path, self.chunk_size)
+
     def encrypt_file(self, file_path: str, output_path: str):
         """Encrypt a file before storage"""
         try:
-            with open(file_path, 'rb') as f:
-                data = f.read()
-            encrypted = self.cipher_suite.encrypt(data)
-            with open(output_path, 'wb') as f:
-                f.write(encrypted)
+            with open(file_path, 'rb') as f, self.open_encrypted_writer(output_path) as writer:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    writer.write(chunk)
         except Exception as e:
             print(f"File encryption error: {str(e)}")
 
     def decrypt_file(self, encrypted_file: str, output_path: str):
         """Decrypt a file when retrieving"""
         try:
-            with open(encrypted_file, 'rb') as f:
-                encrypted = f.read()
-            decrypted = self.cipher_suite.decrypt(encrypted)
             with open(output_path, 'wb') as f:
-                f.write(decrypted)
+                for chunk in self.iter_decrypt(encrypted_file):
+                    f.write(chunk)
         except Exception as e:
             print(f"File decryption error: {str(e)}")
 
+    def is_chunked_file(self, encrypted_file: str) -> bool:
+        with open(encrypted_file, 'rb') as f:
+            return f.read(len(FILE_MAGIC)) == FILE_MAGIC
+
+    def iter_decrypt(self, encrypted_file: str, start: int = 0, end: int = None):
+        """Yield the plaintext of bytes [start, end) of an encrypted file.
+
+        Chunked files are decrypted one chunk at a time, seeking straight to
+        the chunk containing ``start``. Files written by the older whole-file
+        Fernet format are decrypted in memory.
+        """
+        if not self.is_chunked_file(encrypted_file):
+            with open(encrypted_file, 'rb') as f:
+                yield self.cipher_suite.decrypt(f.read())[start:end]
+            return
+
+        file_size = os.path.getsize(encrypted_file)
+        with open(encrypted_file, 'rb') as f:
+            header = f.read(FILE_HEADER.size)
+            if len(header) != FILE_HEADER.size:
+                raise ValueError("Encrypted file is truncated")
+            _, chunk_size, nonce_prefix = FILE_HEADER.unpack(header)
+            if chunk_size == 0:
+                raise ValueError("Encrypted file has an invalid header")
+            sealed_size = chunk_size + TAG_SIZE
+            body_size = file_size - FILE_HEADER.size
+            # Full chunks, then a final chunk shorter than a full one (possibly empty)
+            chunk_count = body_size // sealed_size + 1
+            if body_size - (chunk_count - 1) * sealed_size < TAG_SIZE:
+                raise ValueError("Encrypted file is truncated")
+            plaintext_size = body_size - chunk_count * TAG_SIZE
+
+            def open_chunk(index):
+                final = index == chunk_count - 1
+                f.seek(FILE_HEADER.size + index * sealed_size)
+                nonce = nonce_prefix + struct.pack('>I', index)
+                aad = header + (b'\x01' if final else b'\x00')
+                return self.file_cipher.decrypt(nonce, f.read(sealed_size), aad)
+
+            # Authenticate the final chunk before yielding anything, so a file cut
+            # short at a chunk boundary fails instead of reading as complete
+            final_chunk = open_chunk(chunk_count - 1)
+            end = plaintext_size if end is None else min(end, plaintext_size)
+            if start >= end:
+                return
+
+            index = start // chunk_size
+            offset = start - index * chunk_size
+            while True:
+                chunk = final_chunk if index == chunk_count - 1 else open_chunk(index)
+                remaining = end - index * chunk_size
+                yield chunk[offset:remaining]
+                if remaining <= len(chunk):
+                    return
+                offset = 0
+                index += 1
+
+    def can_decrypt(self, encrypted_file: str) -> bool:
+        """Whether the file was encrypted with this key (only its first chunk is decrypted)"""
+        try:
+            next(self.iter_decrypt(encrypted_file), None)
+            return True
+        except Exception:
+            return False
+
+    def reencrypt_file(self, encrypted_file: str, target) -> None:
+        """Re-encrypt a file in place for the key of ``target``, another EncryptionUtils.
+
+        The new file is written next to the old one and swapped in only once
+        it is complete. Files in the whole-file Fernet format come out chunked.
+        """
+        partial_path = encrypted_file + '.rekey'
+        try:
+            with target.open_encrypted_writer(partial_path) as writer:
+                for chunk in self.iter_decrypt(encrypted_file):
+                    writer.write(chunk)
+            os.replace(partial_path, encrypted_file)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+    def decrypt_range(self, encrypted_file: str, start: int, length: int) -> bytes:
+        """Decrypt only the requested byte range of an encrypted file"""
+        return b''.join(self.iter_decrypt(encrypted_file, start, start + length))
+
     def generate_audit_log(self, action: str, user_id: int, record_id: int = None):
         """Generate audit log entry"""
         try:
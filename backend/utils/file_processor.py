@@ -1,8 +1,3 @@
-import pytesseract
-from PIL import Image
-import pdfplumber
-import cv2
-import numpy as np
 import os
 from datetime import datetime
 import json
@@ -19,6 +14,7 @@ class FileProcessor:
     def process_pdf(self, file_path: str) -> dict:
         """Extract text from PDF and analyze content"""
         try:
+            import pdfplumber
             text = ""
             with pdfplumber.open(file_path) as pdf:
                 for page in pdf.pages:
@@ -32,6 +28,9 @@ class FileProcessor:
     def process_image(self, file_path: str) -> dict:
         """Process medical images"""
         try:
+            import cv2
+            import pytesseract
+
             # Load image
             image = cv2.imread(file_path)
             if image is None:
@@ -0,0 +1,158 @@
+import numpy as np
+
+# Trend analysis over health_metrics readings. Every series of a request (one
+# per owner, metric and value component) is laid out in flat NumPy arrays
+# sorted by series and time, and the statistics are computed for all of them
+# at once with grouped reductions (bincount, cumsum) instead of Python loops,
+# so analyzing a doctor's whole panel takes the same few array passes as
+# analyzing a single patient.
+
+COMPONENTS = ('value', 'secondary_value')
+PERCENTILES = (10, 50, 90)
+TREND_T_STAT = 2.0  # |slope / standard error| above which a slope counts as a trend
+
+def _divide(a, b):
+    return np.divide(a, b, out=np.full(np.shape(a), np.nan), where=b != 0)
+
+def _grouped_stats(group, t, v, n_groups: int, window: int, z_threshold: float) -> dict:
+    """Per-group statistics of readings sorted by (group, t)"""
+    counts = np.bincount(group, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    n = counts.astype(float)
+
+    mean_t = _divide(np.bincount(group, t, n_groups), n)
+    mean_v = _divide(np.bincount(group, v, n_groups), n)
+    dt = t - mean_t[group]
+    dv = v - mean_v[group]
+    sxx = np.bincount(group, dt * dt, n_groups)
+    sxy = np.bincount(group, dt * dv, n_groups)
+    syy = np.bincount(group, dv * dv, n_groups)
+
+    # Least-squares slope and its t statistic
+    slope = _divide(sxy, sxx)
+    residual = np.maximum(syy - np.nan_to_num(slope) * sxy, 0.0)
+    se = np.sqrt(_divide(residual, (n - 2) * sxx))
+    se[n < 3] = np.nan
+    t_stat = _divide(slope, se)
+    t_stat[(se == 0) & (slope != 0)] = np.inf * np.sign(slope[(se == 0) & (slope != 0)])
+    t_stat[(se == 0) & (slope == 0)] = 0.0
+
+    # z-scores against each series' own mean and standard deviation
+    std = np.sqrt(_divide(syy, n))
+    z = np.nan_to_num(_divide(dv, std[group]))
+
+    # Trailing mean over up to ``window`` readings, never crossing into the previous series
+    index = np.arange(len(v))
+    first = np.maximum(index - window + 1, starts[group])
+    cumulative = np.concatenate(([0.0], np.cumsum(v)))
+    rolling = (cumulative[index + 1] - cumulative[first]) / (index + 1 - first)
+
+    # Percentiles with linear interpolation inside each group's sorted values
+    by_value = v[np.lexsort((v, group))]
+    percentiles = {}
+    present = counts > 0
+    for p in PERCENTILES:
+        position = starts + p / 100 * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        values = np.full(n_groups, np.nan)
+        values[present] = by_value[low[present]] + (by_value[high[present]] - by_value[low[present]]) \
+            * (position[present] - low[present])
+        percentiles[p] = values
+
+    last = starts + counts - 1
+    return {
+        'count': counts,
+        'mean': mean_v,
+        'std': std,
+        'slope': slope,
+        't_stat': t_stat,
+        'rolling_mean': np.where(present, rolling[np.maximum(last, 0)] if len(v) else np.nan, np.nan),
+        'percentiles': percentiles,
+        'z': z,
+        'anomaly': np.abs(z) > z_threshold
+    }
+
+def _number(value):
+    return None if value is None or not np.isfinite(value) else round(float(value), 4)
+
+def _trend(count: int, t_stat: float) -> str:
+    if count < 3:
+        return 'Insufficient data'
+    if t_stat > TREND_T_STAT:
+        return 'Increasing'
+    if t_stat < -TREND_T_STAT:
+        return 'Decreasing'
+    return 'Stable'
+
+def analyze_rows(rows, window: int = 3, z_threshold: float = 2.0) -> dict:
+    """Analyze readings given as (owner, metric, observed_at, value,
+    secondary_value, status, unit) tuples, in any order.
+
+    Returns {owner: {metric: analysis}}. The trend of a metric follows its
+    first component; blood pressure, for example, trends with systolic.
+    """
+    rows = list(rows)
+    if not rows:
+        return {}
+    series = {}
+    series_index = np.fromiter((series.setdefault((r[0], r[1]), len(series)) for r in rows), int, len(rows))
+    days = np.array([r[2] for r in rows], dtype='datetime64[s]').astype(np.int64) / 86400.0
+    values = np.array([[np.nan if r[3] is None else r[3], np.nan if r[4] is None else r[4]] for r in rows], float)
+
+    # One entry per (row, component) that has a value; group = series * 2 + component
+    row_index = np.repeat(np.arange(len(rows)), 2)
+    component = np.tile(np.arange(2), len(rows))
+    flat = values.ravel()
+    keep = ~np.isnan(flat)
+    row_index, component, flat = row_index[keep], component[keep], flat[keep]
+    group = series_index[row_index] * 2 + component
+    order = np.lexsort((row_index, days[row_index], group))
+    row_index, component, flat, group = row_index[order], component[order], flat[order], group[order]
+
+    stats = _grouped_stats(group, days[row_index], flat, len(series) * 2, window, z_threshold)
+
+    # Latest row and first/last observation of each series
+    order = np.lexsort((np.arange(len(rows)), days, series_index))
+    last_row = np.full(len(series), -1)
+    last_row[series_index[order]] = order
+    first_row = np.full(len(series), -1)
+    first_row[series_index[order[::-1]]] = order[::-1]
+    readings = np.bincount(series_index, minlength=len(series))
+
+    anomalies = {}
+    for i in np.nonzero(stats['anomaly'])[0]:
+        r = rows[row_index[i]]
+        anomalies.setdefault(group[i] // 2, []).append({
+            'observed_at': r[2].isoformat(),
+            'component': COMPONENTS[component[i]],
+            'value': _number(flat[i]),
+            'z': _number(stats['z'][i])
+        })
+
+    result = {}
+    for (owner, metric), s in series.items():
+        latest = rows[last_row[s]]
+        analysis = {
+            'unit': latest[6],
+            'count': int(readings[s]),
+            'first_observed': rows[first_row[s]][2].isoformat(),
+            'last_observed': latest[2].isoformat(),
+            'latest': {'value': latest[3], 'secondary_value': latest[4], 'status': latest[5]},
+            'trend': _trend(int(stats['count'][s * 2]), stats['t_stat'][s * 2]),
+            'anomalies': anomalies.get(s, [])
+        }
+        for c, name in enumerate(COMPONENTS):
+            g = s * 2 + c
+            if not stats['count'][g]:
+                continue
+            analysis[name] = {
+                'mean': _number(stats['mean'][g]),
+                'std': _number(stats['std'][g]),
+                'rolling_mean': _number(stats['rolling_mean'][g]),
+                'slope_per_day': _number(stats['slope'][g]),
+                'trend': _trend(int(stats['count'][g]), stats['t_stat'][g]),
+                'percentiles': {f"p{p}": _number(stats['percentiles'][p][g]) for p in PERCENTILES}
+            }
+        result.setdefault(owner, {})[metric] = analysis
+    return result
@@ -0,0 +1,93 @@
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+from backend.utils.encryption_utils import get_encryption_utils
+
+# Leading bytes of each accepted upload type: (signature, extension, MIME type)
+FILE_SIGNATURES = [
+    (b'%PDF-', 'pdf', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+]
+
+class UploadTooLarge(ValueError):
+    pass
+
+class UnsupportedFileType(ValueError):
+    pass
+
+class IngestedFile:
+    def __init__(self, path: str, size: int, content_hash: str, extension: str, mime_type: str,
+                 plaintext_path: str = None):
+        self.path = path
+        self.size = size
+        self.content_hash = content_hash
+        self.extension = extension
+        self.mime_type = mime_type
+        self.plaintext_path = plaintext_path
+
+    def cleanup(self):
+        """Remove the plaintext copy kept for extraction, if any"""
+        if self.plaintext_path and os.path.exists(self.plaintext_path):
+            os.remove(self.plaintext_path)
+        self.plaintext_path = None
+
+def sniff_file_type(head: bytes):
+    """Return (extension, MIME type) for the leading bytes of a file, or None"""
+    for signature, extension, mime_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return extension, mime_type
+    return None
+
+def ingest_upload(stream, upload_folder: str, name_prefix: str, max_bytes: int,
+                  keep_plaintext: bool = False, chunk_size: int = 64 * 1024) -> IngestedFile:
+    """Stream an upload to encrypted storage in a single pass.
+
+    The stream is read in chunks once. Each chunk counts towards
+    ``max_bytes``, updates the SHA-256 of the content and is written through
+    the chunked file encryptor; the first chunk also decides the file type
+    from its signature rather than the client supplied name. The encrypted
+    file only appears under its final name once the whole upload was
+    accepted. With ``keep_plaintext`` a plaintext temp copy is written in the
+    same pass for extraction; the caller removes it with ``cleanup()``.
+    """
+    head = stream.read(chunk_size)
+    detected = sniff_file_type(head)
+    if detected is None:
+        raise UnsupportedFileType("Only PDF, PNG and JPEG files are allowed")
+    extension, mime_type = detected
+
+    os.makedirs(upload_folder, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    final_path = os.path.join(upload_folder, f"{timestamp}_{name_prefix}_{os.urandom(4).hex()}.{extension}.enc")
+    partial_path = final_path + ".part"
+
+    digest = hashlib.sha256()
+    size = 0
+    plaintext = tempfile.NamedTemporaryFile(suffix=f".{extension}", delete=False) if keep_plaintext else None
+    try:
+        with get_encryption_utils().open_encrypted_writer(partial_path) as writer:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)}MB upload limit")
+                digest.update(chunk)
+                writer.write(chunk)
+                if plaintext:
+                    plaintext.write(chunk)
+                chunk = stream.read(chunk_size)
+        os.replace(partial_path, final_path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        if plaintext:
+            plaintext.close()
+            os.remove(plaintext.name)
+        raise
+
+    if plaintext:
+        plaintext.close()
+    return IngestedFile(final_path, size, digest.hexdigest(), extension, mime_type,
+                        plaintext.name if plaintext else None)
@@ -0,0 +1,160 @@
+"""
+Query plans and latencies of the hot listing queries before and after the
+composite indexes.
+
+Seeds a throwaway database, runs each query without the indexes declared
+on the models, creates them and runs the queries again:
+
+    python benchmarks/bench_indexes.py --appointments 200000
+
+Pass --database-url to run against another database (for example an empty
+Postgres database); every table of the app is created in it and dropped at
+the end.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, select, text, tuple_
+from backend.app import db
+from backend.app.models import User, DoctorProfile, PatientProfile, Appointment, HealthRecord, FileAttachment
+
+INDEXED_TABLES = [Appointment.__table__, HealthRecord.__table__, FileAttachment.__table__]
+START = datetime(2023, 1, 1)
+
+def seed(engine, doctors: int, patients: int, appointments: int, records: int):
+    rng = random.Random(42)
+    users = [{'id': i, 'email': f'user{i}@example.com', 'first_name': 'F', 'last_name': 'L',
+              'role': 'doctor' if i <= doctors else 'patient', 'created_at': START}
+             for i in range(1, doctors + patients + 1)]
+    statuses = ['scheduled'] * 2 + ['completed'] * 7 + ['cancelled']
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), users)
+        conn.execute(DoctorProfile.__table__.insert(), [
+            {'id': i, 'user_id': i, 'specialty': 'General', 'license_number': f'LIC{i}'}
+            for i in range(1, doctors + 1)
+        ])
+        conn.execute(PatientProfile.__table__.insert(), [
+            {'id': i, 'user_id': doctors + i, 'date_of_birth': START.date()}
+            for i in range(1, patients + 1)
+        ])
+        batch = []
+        for i in range(1, appointments + 1):
+            batch.append({
+                'id': i,
+                'user_id': doctors + rng.randint(1, patients),
+                'doctor_id': rng.randint(1, doctors),
+                'appointment_date': START + timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+                'status': rng.choice(statuses),
+                'created_at': START
+            })
+            if len(batch) == 10000:
+                conn.execute(Appointment.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Appointment.__table__.insert(), batch)
+        conn.execute(HealthRecord.__table__.insert(), [
+            {'id': i, 'patient_id': rng.randint(1, patients), 'record_type': 'lab_result',
+             'title': 'Result', 'content': 'x', 'created_at': START + timedelta(minutes=rng.randint(0, 10 ** 6))}
+            for i in range(1, records + 1)
+        ])
+
+def hot_queries(doctor_id: int, patient_user_id: int, patient_profile_id: int, day: datetime):
+    """The statements behind the dashboards, listings and reminder scans"""
+    a, r = Appointment.__table__.c, HealthRecord.__table__.c
+    page_cursor = (day, 10 ** 9)
+    return {
+        'doctor day schedule': select(a.id).where(
+            a.doctor_id == doctor_id, a.appointment_date >= day, a.appointment_date < day + timedelta(days=1)
+        ).order_by(a.appointment_date),
+        'doctor listing page': select(a.id).where(
+            a.doctor_id == doctor_id, tuple_(a.appointment_date, a.id) < page_cursor
+        ).order_by(a.appointment_date.desc(), a.id.desc()).limit(50),
+        'patient upcoming': select(a.id).where(
+            a.user_id == patient_user_id, a.status == 'scheduled'
+        ).order_by(a.appointment_date).limit(5),
+        'patient listing page': select(a.id).where(
+            a.user_id == patient_user_id
+        ).order_by(a.appointment_date.desc(), a.id.desc()).limit(50),
+        'patient records page': select(r.id).where(
+            r.patient_id == patient_profile_id
+        ).order_by(r.created_at.desc(), r.id.desc()).limit(50),
+        'reminder scan': select(a.id).where(
+            a.status == 'scheduled', a.reminder_sent_at.is_(None),
+            a.appointment_date > day, a.appointment_date <= day + timedelta(days=1)
+        ),
+    }
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(conn.engine, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        return '\n'.join(f"    {row[-1]}" for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+    return '\n'.join(f"    {row[0]}" for row in conn.execute(text('EXPLAIN ' + sql)))
+
+def measure(engine, queries: dict, repeat: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, statement in queries.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(statement).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = (statistics.median(timings), explain(conn, statement))
+    return results
+
+def report(title: str, results: dict):
+    print(f"\n== {title} ==")
+    for name, (median_ms, plan) in results.items():
+        print(f"{name}: {median_ms:.2f} ms (median)")
+        print(plan)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the composite indexes.')
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--appointments', type=int, default=200000)
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_indexes.db')}"
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    try:
+        for table in INDEXED_TABLES:
+            for index in table.indexes:
+                index.drop(engine)
+
+        start = time.perf_counter()
+        seed(engine, args.doctors, args.patients, args.appointments, args.records)
+        print(f"Seeded {args.appointments} appointments and {args.records} health records "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        queries = hot_queries(doctor_id=7, patient_user_id=args.doctors + 11, patient_profile_id=11,
+                              day=START + timedelta(days=400))
+        before = measure(engine, queries, args.repeat)
+        report('without indexes', before)
+
+        for table in INDEXED_TABLES:
+            for index in table.indexes:
+                index.create(engine)
+        with engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+        after = measure(engine, queries, args.repeat)
+        report('with indexes', after)
+
+        print('\n== speedup ==')
+        for name in queries:
+            print(f"{name}: {before[name][0]:.2f} ms -> {after[name][0]:.2f} ms "
+                  f"({before[name][0] / max(after[name][0], 1e-6):.1f}x)")
+    finally:
+        db.metadata.drop_all(engine)
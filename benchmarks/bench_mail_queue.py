@@ -0,0 +1,72 @@
+"""
+Compare one SMTP session per message with the pooled mail queue.
+
+Runs against the local SMTP sink, so no mail leaves the machine:
+
+    python benchmarks/bench_mail_queue.py --messages 500
+"""
+import argparse
+import os
+import smtplib
+import sys
+import tempfile
+import time
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.utils.smtp_sink import SMTPSink
+
+def send_one_connection_per_message(port: int, count: int):
+    for i in range(count):
+        server = smtplib.SMTP('127.0.0.1', port, timeout=5)
+        server.login('bench@example.com', 'secret')
+        msg = MIMEText(f'Message {i}')
+        msg['From'] = 'bench@example.com'
+        msg['To'] = 'patient@example.com'
+        msg['Subject'] = 'Benchmark'
+        server.send_message(msg)
+        server.quit()
+
+def send_through_queue(port: int, count: int, pool_size: int):
+    from backend.config.config import Config
+    Config.MAIL_SERVER = '127.0.0.1'
+    Config.MAIL_PORT = port
+    Config.MAIL_USE_TLS = False
+    Config.MAIL_USERNAME = 'bench@example.com'
+    Config.MAIL_PASSWORD = 'secret'
+    Config.MAIL_POOL_SIZE = pool_size
+    Config.MAIL_DEAD_LETTER_PATH = os.path.join(tempfile.mkdtemp(), 'dead_letters.db')
+
+    from backend.app.utils.mail_queue import get_mail_queue
+    mail_queue = get_mail_queue()
+    for i in range(count):
+        mail_queue.send('patient@example.com', 'Benchmark', f'Message {i}')
+    mail_queue.flush()
+    return mail_queue
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--pool-size', type=int, default=2)
+    args = parser.parse_args()
+
+    sink = SMTPSink().start()
+
+    start = time.perf_counter()
+    send_one_connection_per_message(sink.port, args.messages)
+    direct = time.perf_counter() - start
+    direct_connections = sink.connections
+
+    start = time.perf_counter()
+    mail_queue = send_through_queue(sink.port, args.messages, args.pool_size)
+    pooled = time.perf_counter() - start
+
+    print(f"{'mode':<28}{'seconds':>10}{'msg/s':>10}{'connections':>14}")
+    print(f"{'connection per message':<28}{direct:>10.3f}{args.messages / direct:>10.0f}{direct_connections:>14}")
+    print(f"{'pooled queue':<28}{pooled:>10.3f}{args.messages / pooled:>10.0f}{mail_queue.connections_opened:>14}")
+    print(f"messages received by sink: {len(sink.messages)}")
+    sink.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Appointment booking throughput on SQLite with N concurrent writer processes,
+with SQLite's defaults ("before") and with the tuned pragmas and busy
+retries of backend.app.utils.sqlite_tuning ("after").
+
+Every writer is a separate process, like a gunicorn worker. Each booking
+runs what the booking page does: list the doctors, insert the appointment
+(and its event row) and commit, then read the patient's appointments back:
+
+    python benchmarks/bench_sqlite_writers.py --writers 1 4 8 --bookings 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+DOCTORS = 5
+
+# Environment of each mode; "before" restores SQLite's defaults and disables retries
+MODES = {
+    'before': {
+        'SQLITE_JOURNAL_MODE': 'DELETE',
+        'SQLITE_SYNCHRONOUS': '',
+        'SQLITE_BUSY_TIMEOUT_MS': '0',
+        'SQLITE_MMAP_SIZE': '0',
+        'SQLITE_CACHE_SIZE_KB': '0',
+        'WRITE_RETRY_ATTEMPTS': '0',
+    },
+    'after': {},
+}
+
+def make_app(database_path: str, mode: str):
+    # Settings are read when backend.config is first imported, so this comes first
+    os.environ.update(MODES[mode], DATABASE_URL=f'sqlite:///{database_path}',
+                      REMINDER_SCHEDULER_ENABLED='false', RESPONSE_CACHE_BACKEND='none')
+    from backend.app import create_app
+    return create_app('development')
+
+def seed(database_path: str, mode: str, writers: int):
+    app = make_app(database_path, mode)
+    from backend.app import db
+    from backend.app.models import User, DoctorProfile
+    with app.app_context():
+        db.create_all()
+        users = [User(email=f'user{i}@example.com', first_name='F', last_name='L',
+                      role='doctor' if i < DOCTORS else 'patient')
+                 for i in range(DOCTORS + writers)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all(DoctorProfile(user_id=u.id, specialty='General', license_number=f'LIC{u.id}')
+                           for u in users[:DOCTORS])
+        db.session.commit()
+        return [u.id for u in users[DOCTORS:]]
+
+def writer(database_path: str, mode: str, user_id: int, bookings: int, start, results):
+    app = make_app(database_path, mode)
+    from sqlalchemy.exc import OperationalError
+    from backend.app import db
+    from backend.app.models import User, DoctorProfile, Appointment
+    from backend.app.utils.sqlite_tuning import commit_with_retry
+    booked = failed = 0
+    start.wait()
+    with app.app_context():
+        for i in range(bookings):
+            doctors = DoctorProfile.query.join(User).all()
+
+            def book():
+                appointment = Appointment(user_id=user_id, doctor_id=doctors[i % len(doctors)].id,
+                                          appointment_date=datetime(2024, 1, 1) + timedelta(hours=i),
+                                          reason='Benchmark', status='scheduled')
+                db.session.add(appointment)
+                return appointment
+            try:
+                commit_with_retry(db.session, book)
+                booked += 1
+            except OperationalError:
+                failed += 1
+            Appointment.query.filter_by(user_id=user_id).order_by(Appointment.appointment_date.desc()).limit(20).all()
+            db.session.remove()
+    results.put((booked, failed))
+
+def run(mode: str, writers: int, bookings: int) -> tuple:
+    # Settings are read once per interpreter, so even seeding runs in a fresh process
+    database_path = os.path.join(tempfile.mkdtemp(), 'bench_writers.db')
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        user_ids = pool.apply(seed, (database_path, mode, writers))
+    start = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=writer, args=(database_path, mode, user_id, bookings, start, results),
+                                 daemon=True)
+                 for user_id in user_ids]
+    for process in processes:
+        process.start()
+    time.sleep(2)  # let every writer import and build its app before the clock starts
+    began = time.perf_counter()
+    start.set()
+    outcomes = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    booked = sum(b for b, _ in outcomes)
+    failed = sum(f for _, f in outcomes)
+    return booked, failed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--bookings', type=int, default=200, help='Bookings per writer process.')
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'writers':>8}{'booked':>9}{'failed':>8}{'seconds':>9}{'bookings/s':>12}")
+    for writers in args.writers:
+        for mode in MODES:
+            booked, failed, elapsed = run(mode, writers, args.bookings)
+            print(f'{mode:<8}{writers:>8}{booked:>9}{failed:>8}{elapsed:>9.2f}{booked / elapsed:>12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Cold-start time and memory of a web worker, as measured by create_app().
+
+Each run starts a fresh interpreter with ``python -X importtime``, builds the
+app and reports the wall time, the peak RSS and the slowest imports. The
+OCR/vision stack must not be among them: it is only loaded by extraction
+workers, on their first document.
+
+    python benchmarks/bench_startup.py --runs 5
+
+--check exits with status 1 if create_app() imports any of the heavy
+extraction modules, so the script can be run as a local regression test.
+--extraction also measures what an extraction worker pays on top, for
+comparison.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that belong to extraction workers only
+HEAVY_MODULES = ['cv2', 'pytesseract', 'pdfplumber', 'pdfminer', 'PIL', 'numpy']
+
+CREATE_APP = """
+import json, resource, sys, time
+start = time.perf_counter()
+from backend.app import create_app
+app = create_app({config!r})
+{extra}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'heavy': [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+EXTRACTION_IMPORTS = """
+from backend.app.utils.file_processor import get_file_processor
+import pdfplumber
+from backend.app.utils.image_pipeline import get_image_pipeline
+"""
+
+def parse_importtime(stderr: str) -> list:
+    """(cumulative microseconds, module) of every import, slowest first"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), module.strip()))
+    return sorted(imports, reverse=True)
+
+def run_once(config: str, extra: str = '') -> tuple:
+    env = dict(os.environ, REMINDER_SCHEDULER_ENABLED='false', PYTHONDONTWRITEBYTECODE='1')
+    code = CREATE_APP.format(config=config, extra=extra, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f'create_app() failed:\n{result.stderr[-2000:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+def measure(label: str, config: str, runs: int, top: int, extra: str = '') -> dict:
+    results = [run_once(config, extra) for _ in range(runs)]
+    seconds = [stats['seconds'] for stats, _ in results]
+    rss = [stats['max_rss_kb'] for stats, _ in results]
+    stats, imports = results[-1]
+    print(f'{label}: {statistics.median(seconds) * 1000:.0f} ms median '
+          f'(min {min(seconds) * 1000:.0f} ms), peak RSS {statistics.median(rss) / 1024:.1f} MB')
+    print(f'  heavy modules loaded: {", ".join(stats["heavy"]) or "none"}')
+    print('  slowest packages (cumulative import time, last run):')
+    packages = [(us, module) for us, module in imports if '.' not in module]
+    for us, module in packages[:top]:
+        print(f'    {us / 1000:8.1f} ms  {module}')
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--config', default='testing', help='Configuration name passed to create_app().')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest imports to list.')
+    parser.add_argument('--extraction', action='store_true',
+                        help='Also measure create_app() plus the extraction stack.')
+    parser.add_argument('--check', action='store_true',
+                        help='Fail if create_app() loads any heavy extraction module.')
+    args = parser.parse_args()
+
+    stats = measure('web worker', args.config, args.runs, args.top)
+    if args.extraction:
+        measure('extraction worker', args.config, args.runs, args.top, EXTRACTION_IMPORTS)
+
+    if args.check and stats['heavy']:
+        print(f'FAIL: create_app() imported {", ".join(stats["heavy"])}')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -127,6 +127,35 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+// Live appointment updates over Server-Sent Events
+document.addEventListener('DOMContentLoaded', function() {
+    if (!window.EventSource || !document.querySelector('[data-live-appointments]')) {
+        return;
+    }
+
+    // The browser reconnects on its own and sends Last-Event-ID to resume
+    var source = new EventSource('/api/events');
+    source.addEventListener('appointment', function(event) {
+        var data = JSON.parse(event.data);
+        var badges = document.querySelectorAll('[data-appointment-status="' + data.appointment_id + '"]');
+        badges.forEach(function(badge) {
+            badge.textContent = data.status.charAt(0).toUpperCase() + data.status.slice(1);
+            badge.className = 'badge bg-' + (data.status === 'completed' ? 'success'
+                : data.status === 'scheduled' ? 'warning' : 'danger');
+        });
+        document.querySelectorAll('.appointment-status-select[data-appointment-id="' + data.appointment_id + '"]')
+            .forEach(function(select) {
+                select.value = data.status;
+            });
+
+        if (data.type === 'created') {
+            showAlert('A new appointment was booked. <a href="" class="alert-link">Refresh</a> to see it.', 'info');
+        } else if (data.type === 'status' && badges.length === 0) {
+            showAlert('An appointment is now ' + data.status + '.', 'info');
+        }
+    });
+});
+
 // Show alert function
 function showAlert(message, type) {
     var alertDiv = document.createElement('div');
@@ -0,0 +1,49 @@
+from datetime import date, datetime, timedelta
+import pytest
+from backend.app import create_app, db
+from backend.app.models import User, DoctorProfile, PatientProfile, Appointment
+from backend.app.utils import response_cache
+
+# Requests must not share an app context with the test: the session lives in
+# the app context, and a shared one would serve objects from its identity map.
+# Helpers that touch the database therefore push their own context.
+
+@pytest.fixture
+def app():
+    # The response cache is a process-wide singleton; start every test empty
+    response_cache._response_cache_instance = None
+    app = create_app('testing')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all(bind_key=None)
+    response_cache._response_cache_instance = None
+
+def make_user(app, email: str, role: str, first_name: str = 'Test', last_name: str = 'User') -> int:
+    with app.app_context():
+        user = User(email=email, first_name=first_name, last_name=last_name, role=role)
+        user.set_password('password')
+        if role == 'doctor':
+            DoctorProfile(user=user, specialty='General', license_number=f'LIC-{email}')
+        else:
+            PatientProfile(user=user, date_of_birth=date(1990, 1, 1))
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def make_appointment(app, patient_id: int, doctor_id: int, days: int = 1, status: str = 'scheduled') -> int:
+    with app.app_context():
+        doctor = db.session.get(User, doctor_id)
+        appointment = Appointment(user_id=patient_id, doctor_id=doctor.doctor_profile.id, status=status,
+                                  reason='Checkup', appointment_date=datetime.utcnow() + timedelta(days=days))
+        db.session.add(appointment)
+        db.session.commit()
+        return appointment.id
+
+def login(app, user_id: int):
+    with app.app_context():
+        email = db.session.get(User, user_id).email
+    client = app.test_client()
+    response = client.post('/auth/login', data={'email': email, 'password': 'password'})
+    assert response.status_code == 302 and '/auth/login' not in response.headers['Location']
+    return client
@@ -0,0 +1,76 @@
+import logging
+import sqlite3
+import pytest
+from backend.app import db
+from backend.app.models import Appointment
+from backend.app.utils.db_routing import get_replica_set
+from backend.config.config import TestingConfig
+from tests.conftest import make_user, make_appointment, login
+
+# A SQLite primary and replica; `flask replicas sync` stands in for replication,
+# so anything written after a sync is only on the primary.
+
+@pytest.fixture(autouse=True)
+def files(tmp_path, monkeypatch):
+    files = {'primary': tmp_path / 'primary.db', 'replica': tmp_path / 'replica.db'}
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{files['primary']}")
+    monkeypatch.setattr(TestingConfig, 'DB_REPLICA_URLS', [f"sqlite:///{files['replica']}"])
+    monkeypatch.setattr(TestingConfig, 'DB_READ_YOUR_WRITES_SECONDS', 0)
+    return files
+
+def sync(app):
+    result = app.test_cli_runner().invoke(args=['replicas', 'sync'])
+    assert result.exit_code == 0, result.output
+
+def count(path, table: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+@pytest.fixture
+def people(app):
+    patient_id = make_user(app, 'patient@example.com', 'patient')
+    doctor_id = make_user(app, 'doctor@example.com', 'doctor', first_name='Gregory', last_name='House')
+    sync(app)
+    return patient_id, doctor_id
+
+def test_writes_go_to_primary(app, files, people):
+    patient_id, doctor_id = people
+    make_appointment(app, patient_id, doctor_id)
+    assert count(files['primary'], 'appointments') == 1
+    assert count(files['replica'], 'appointments') == 0
+
+    # Reads outside @read_only handlers see the write at once
+    with app.app_context():
+        assert db.session.query(Appointment).count() == 1
+
+def test_read_only_requests_read_from_replica(app, files, people):
+    patient_id, doctor_id = people
+    client = login(app, patient_id)
+    make_appointment(app, patient_id, doctor_id)
+    assert client.get('/api/appointments').get_json() == []
+
+    sync(app)
+    assert len(client.get('/api/appointments').get_json()) == 1
+
+def test_response_cache_is_filled_from_primary(app, files, people):
+    patient_id, doctor_id = people
+    client = login(app, patient_id)
+    make_appointment(app, patient_id, doctor_id)
+
+    # The dashboard is @read_only, but its cached data must not come from a stale replica
+    page = client.get('/patient/dashboard').get_data(as_text=True)
+    assert 'Dr. Gregory House' in page
+    assert count(files['replica'], 'appointments') == 0
+
+def test_unavailable_replica_falls_back_to_primary(app, files, caplog):
+    patient_id = make_user(app, 'patient@example.com', 'patient')
+    client = login(app, patient_id)
+    # Not a database file, so every connection to the replica fails
+    files['replica'].mkdir()
+
+    with caplog.at_level(logging.ERROR, logger='backend.app.utils.db_routing'):
+        response = client.get('/api/appointments')
+    assert response.status_code == 200 and response.get_json() == []
+    assert 'is unavailable' in caplog.text
+    with app.app_context():
+        assert get_replica_set().status()[0][1] is False
@@ -0,0 +1,51 @@
+import os
+import pytest
+from backend.utils.encryption_utils import EncryptionUtils, FILE_HEADER, TAG_SIZE
+
+CHUNK_SIZE = 64
+
+@pytest.fixture
+def utils():
+    utils = EncryptionUtils.for_secret('test-secret')
+    utils.chunk_size = CHUNK_SIZE
+    return utils
+
+def encrypt(utils, tmp_path, data: bytes) -> str:
+    path = str(tmp_path / 'file.enc')
+    with utils.open_encrypted_writer(path) as writer:
+        writer.write(data)
+    return path
+
+def read(utils, path: str) -> bytes:
+    return b''.join(utils.iter_decrypt(path))
+
+@pytest.mark.parametrize('size', [0, 1, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 3 * CHUNK_SIZE, 3 * CHUNK_SIZE + 5])
+def test_round_trip(utils, tmp_path, size):
+    data = os.urandom(size)
+    path = encrypt(utils, tmp_path, data)
+    assert read(utils, path) == data
+    assert utils.decrypt_range(path, 10, 100) == data[10:110]
+
+@pytest.mark.parametrize('size', [CHUNK_SIZE, 2 * CHUNK_SIZE, 2 * CHUNK_SIZE + 7])
+@pytest.mark.parametrize('cut', list(range(1, TAG_SIZE + 1)) + [CHUNK_SIZE + TAG_SIZE])
+def test_truncated_file_fails(utils, tmp_path, size, cut):
+    path = encrypt(utils, tmp_path, os.urandom(size))
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - cut)
+    with pytest.raises(Exception):
+        read(utils, path)
+    with pytest.raises(Exception):
+        utils.decrypt_range(path, 0, 10)
+
+@pytest.mark.parametrize('length', [4, FILE_HEADER.size - 1, FILE_HEADER.size])
+def test_short_file_raises_value_error(utils, tmp_path, length):
+    path = encrypt(utils, tmp_path, b'data')
+    with open(path, 'r+b') as f:
+        f.truncate(length)
+    with pytest.raises(ValueError):
+        read(utils, path)
+
+def test_other_key_cannot_decrypt(utils, tmp_path):
+    path = encrypt(utils, tmp_path, os.urandom(200))
+    assert utils.can_decrypt(path)
+    assert not EncryptionUtils.for_secret('another-secret').can_decrypt(path)
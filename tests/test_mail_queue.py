@@ -0,0 +1,111 @@
+import socket
+import threading
+import pytest
+from backend.app.utils import mail_queue
+from backend.app.utils.mail_queue import MailQueue
+from backend.app.utils.smtp_sink import SMTPSink
+from backend.config.config import Config
+
+class DroppingSink(SMTPSink):
+    """Sink that can cut every open connection, like a server restart"""
+
+    def __init__(self):
+        super().__init__()
+        self.sockets = []
+
+    def finish_request(self, request, client_address):
+        self.sockets.append(request)
+        super().finish_request(request, client_address)
+
+    def drop_connections(self):
+        for sock in self.sockets:
+            sock.shutdown(socket.SHUT_RDWR)
+        self.sockets = []
+
+@pytest.fixture
+def sink():
+    sink = DroppingSink().start()
+    yield sink
+    sink.stop()
+
+@pytest.fixture
+def make_queue(sink, tmp_path, monkeypatch):
+    def make_queue(**settings):
+        settings = {
+            'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': sink.port, 'MAIL_USE_TLS': False,
+            'MAIL_USERNAME': 'clinic@example.com', 'MAIL_PASSWORD': 'secret',
+            'MAIL_POOL_SIZE': 1, 'MAIL_MAX_RETRIES': 2, 'MAIL_RETRY_BACKOFF': 0.05,
+            'MAIL_IDLE_TIMEOUT': 60, 'MAIL_MAX_MESSAGES_PER_CONNECTION': 100,
+            'MAIL_DEAD_LETTER_PATH': str(tmp_path / 'dead_letters.db'), **settings
+        }
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value)
+        # MailQueue is a singleton configured on first use
+        monkeypatch.setattr(MailQueue, '_instance', None)
+        monkeypatch.setattr(mail_queue, '_mail_queue_instance', None)
+        return mail_queue.get_mail_queue()
+    return make_queue
+
+def flush(queue, timeout=10):
+    done = threading.Thread(target=queue.flush, daemon=True)
+    done.start()
+    done.join(timeout)
+    assert not done.is_alive(), 'mail queue did not drain'
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_messages_share_connections(make_queue, sink):
+    queue = make_queue(MAIL_MAX_MESSAGES_PER_CONNECTION=10)
+    for i in range(25):
+        assert queue.send(f'patient{i}@example.com', 'Reminder', f'Message {i}')
+    flush(queue)
+
+    assert queue.sent == 25
+    assert len(sink.messages) == 25
+    assert queue.connections_opened == sink.connections == 3
+    assert {m['recipients'][0] for m in sink.messages} == {f'<patient{i}@example.com>' for i in range(25)}
+
+def test_reconnects_after_dropped_connection(make_queue, sink):
+    queue = make_queue()
+    queue.send('first@example.com', 'Reminder', 'Before')
+    flush(queue)
+    sink.drop_connections()
+
+    queue.send('second@example.com', 'Reminder', 'After')
+    flush(queue)
+
+    assert [m['recipients'] for m in sink.messages] == [['<first@example.com>'], ['<second@example.com>']]
+    assert queue.connections_opened == 2
+    assert queue.dead_letters.count() == 0
+
+def test_failed_message_is_dead_lettered_and_requeued(make_queue, sink):
+    queue = make_queue(MAIL_PORT=closed_port(), MAIL_MAX_RETRIES=1)
+    queue.send('patient@example.com', 'Reminder', 'Body')
+    flush(queue)
+    assert queue.dead_letters.count() == 1
+    assert sink.messages == []
+
+    queue.smtp_port = sink.port
+    assert queue.requeue_dead_letters() == 1
+    flush(queue)
+    assert len(sink.messages) == 1
+    assert queue.dead_letters.count() == 0
+
+def test_sender_survives_dead_letter_failure(make_queue, sink, monkeypatch):
+    queue = make_queue(MAIL_PORT=closed_port(), MAIL_MAX_RETRIES=0)
+
+    def broken_store(message):
+        raise OSError('disk full')
+    monkeypatch.setattr(queue.dead_letters, 'add', broken_store)
+    queue.send('lost@example.com', 'Reminder', 'Dropped')
+    flush(queue)
+
+    # The same single sender thread delivers the next message
+    queue.smtp_port = sink.port
+    queue.send('patient@example.com', 'Reminder', 'Delivered')
+    flush(queue)
+    assert [m['recipients'] for m in sink.messages] == [['<patient@example.com>']]
+    assert queue.sent == 1
@@ -0,0 +1,20 @@
+from backend.app import create_app
+from backend.config.config import TestingConfig
+
+def metrics_app(monkeypatch, token):
+    monkeypatch.setattr(TestingConfig, 'METRICS_TOKEN', token)
+    return create_app('testing').test_client()
+
+def test_metrics_disabled_without_token(monkeypatch):
+    client = metrics_app(monkeypatch, None)
+    assert client.get('/api/metrics').status_code == 404
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer '}).status_code == 404
+
+def test_metrics_require_token(monkeypatch):
+    client = metrics_app(monkeypatch, 's3cret')
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = client.get('/api/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert 'extraction_cache_hits_total' in response.get_data(as_text=True)
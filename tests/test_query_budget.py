@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import pytest
+from backend.app import create_app, db
+from backend.config.config import TestingConfig
+from backend.app.models import User, HealthRecord, FileAttachment
+from backend.app.utils.query_counter import QueryBudgetExceeded, assert_max_queries, count_queries
+from tests.conftest import make_user, make_appointment, login
+
+def add_records(app, patient_id: int, count: int, doctor_id: int = None):
+    for i in range(count):
+        appointment_id = make_appointment(app, patient_id, doctor_id, days=-i - 1, status='completed') if doctor_id else None
+        with app.app_context():
+            record = HealthRecord(patient=db.session.get(User, patient_id).patient_profile, appointment_id=appointment_id,
+                                  record_type='lab_result', title=f'Record {i}', content='Results',
+                                  created_at=datetime.utcnow() - timedelta(hours=i))
+            record.attachments = [
+                FileAttachment(filename=f'scan{i}-{n}.pdf', file_type='application/pdf', file_path=f'/nonexistent/{i}-{n}.pdf')
+                for n in range(2)
+            ]
+            db.session.add(record)
+            db.session.commit()
+
+def queries_for(client, url: str) -> int:
+    with count_queries() as counter:
+        response = client.get(url)
+    assert response.status_code == 200
+    return counter.count
+
+@pytest.fixture
+def patient_id(app):
+    return make_user(app, 'patient@example.com', 'patient')
+
+def test_appointments_query_count_does_not_grow_with_rows(app, patient_id):
+    doctor_ids = [make_user(app, f'doctor{i}@example.com', 'doctor', last_name=f'Doc{i}') for i in range(6)]
+    make_appointment(app, patient_id, doctor_ids[0])
+    client = login(app, patient_id)
+    single = queries_for(client, '/api/appointments')
+
+    for i, doctor_id in enumerate(doctor_ids):
+        make_appointment(app, patient_id, doctor_id, days=i + 2)
+    with assert_max_queries(single):
+        response = client.get('/api/appointments')
+    assert {a['doctor'] for a in response.get_json()} == {f'Dr. Test Doc{i}' for i in range(6)}
+
+def test_health_records_query_count_does_not_grow_with_rows(app, patient_id):
+    add_records(app, patient_id, 1)
+    client = login(app, patient_id)
+    single = queries_for(client, '/api/health-records')
+
+    add_records(app, patient_id, 8)
+    with assert_max_queries(single):
+        response = client.get('/api/health-records')
+    records = response.get_json()
+    assert len(records) == 9
+    assert all(len(r['attachments']) == 2 for r in records)
+
+def test_health_records_page_loads_doctors_eagerly(app, patient_id):
+    add_records(app, patient_id, 1, make_user(app, 'doctor@example.com', 'doctor', first_name='Gregory', last_name='House'))
+    client = login(app, patient_id)
+    single = queries_for(client, '/patient/health-records')
+
+    add_records(app, patient_id, 8, make_user(app, 'other@example.com', 'doctor', last_name='Other'))
+    with assert_max_queries(single):
+        response = client.get('/patient/health-records')
+    page = response.get_data(as_text=True)
+    assert 'Dr. Gregory House' in page
+    assert page.count('Dr. Test Other') == 8
+
+def test_request_over_budget_fails(monkeypatch):
+    # The budget is read when the app is built
+    monkeypatch.setattr(TestingConfig, 'MAX_QUERIES_PER_REQUEST', 1)
+    app = create_app('testing')
+    client = login(app, make_user(app, 'patient@example.com', 'patient'))
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/api/health-records')